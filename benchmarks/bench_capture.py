@@ -0,0 +1,84 @@
+'''
+截图性能基准：对比旧的每帧重建 mss 句柄 + 两次拷贝，与长期会话 + 零拷贝 Frame
+
+用法: python benchmarks/bench_capture.py [--frames 200] [--width 800] [--height 300]
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core'))
+
+import mss
+from PIL import Image
+
+from ScreenCapture import ScreenCapture
+
+
+class Rect:
+    """QRect 的最小替身，避免依赖 Qt"""
+
+    def __init__(self, left, top, width, height):
+        self._left, self._top, self._width, self._height = left, top, width, height
+
+    def left(self):
+        return self._left
+
+    def top(self):
+        return self._top
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+def legacy_capture(holder, monitor):
+    """基线实现：with 语句在每次调用后关闭句柄，随后 .rgb + frombytes 两次拷贝"""
+    if holder.get('sct') is None:
+        holder['sct'] = mss.mss()
+    with holder['sct'] as sct:
+        sct_img = sct.grab(monitor)
+        return Image.frombytes('RGB', (sct_img.width, sct_img.height), sct_img.rgb)
+
+
+def run(label, fn, frames):
+    fn()  # 预热
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} mean {mean * 1000:7.2f} ms   p50 {samples[len(samples) // 2] * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--left', type=int, default=0)
+    parser.add_argument('--top', type=int, default=0)
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=300)
+    args = parser.parse_args()
+
+    rect = Rect(args.left, args.top, args.width, args.height)
+    monitor = {"top": args.top, "left": args.left, "width": args.width, "height": args.height}
+
+    holder = {}
+    capture = ScreenCapture()
+
+    print(f"Capturing {args.width}x{args.height} region, {args.frames} frames per case")
+    run("legacy (reopen + 2 copies)", lambda: legacy_capture(holder, monitor), args.frames)
+    run("session, Frame only", lambda: capture.capture_area(rect), args.frames)
+    run("session, Frame + gray()", lambda: capture.capture_area(rect).gray(), args.frames)
+    run("session, Frame + to_image()", lambda: capture.capture_area(rect).to_image(), args.frames)
+    capture.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+'''
+HTTP 连接复用基准：对比每次新建连接的 requests.post 与 TranslatorEngine 的长连接池
+
+用法: python benchmarks/bench_http.py [--requests 200]
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core'))
+
+import requests
+
+from stub_server import start_server
+from TranslatorEngine import TranslatorEngine
+
+
+def run(label, fn, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    print(f"{label:<30} mean {mean * 1000:7.2f} ms   p50 {samples[len(samples) // 2] * 1000:7.2f} ms   p95 {samples[int(len(samples) * 0.95) - 1] * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = start_server()
+    url = f"{base_url}/api"
+    engine = TranslatorEngine(youdao_url=url)
+
+    print(f"{args.requests} requests per case against {url}")
+    run("cold: requests.post per call", lambda i: requests.post(url, data={'q': f'line {i}', 'to': 'zh-CHS'}).json(), args.requests)
+    run("warm: engine.session", lambda i: engine.session.post(url, data={'q': f'line {i}', 'to': 'zh-CHS'}, timeout=engine.timeout).json(), args.requests)
+    run("warm: engine.youdao_translate", lambda i: engine.youdao_translate(f'line {i}'), args.requests)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+'''
+OCR 后端基准：对比 pytesseract（每帧一个子进程）与 tesserocr（常驻模型）的单帧延迟
+
+用法: python benchmarks/bench_ocr.py [--frames 30] [--lang eng]
+'''
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core'))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from OcrBackend import PytesseractBackend, TesserocrBackend
+from OcrEngine import OcrEngine
+
+SAMPLE_LINES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Press START to continue your adventure.",
+    "Player2: anyone up for another round?",
+]
+
+
+def render_sample(lines=SAMPLE_LINES, font_size=24):
+    """渲染一张白底黑字的测试图片"""
+    try:
+        font = ImageFont.truetype('DejaVuSans.ttf', font_size)
+    except OSError:
+        font = ImageFont.load_default()
+    line_height = int(font_size * 1.6)
+    img = Image.new('RGB', (900, line_height * len(lines) + 20), 'white')
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((10, 10 + i * line_height), line, fill='black', font=font)
+    return img
+
+
+def run(backend, img, lang, frames):
+    backend.image_to_string(img, lang)  # 预热（tesserocr 在这里加载模型）
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        backend.image_to_string(img, lang)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    print(f"{backend.name:<12} mean {mean * 1000:8.1f} ms   p50 {samples[len(samples) // 2] * 1000:8.1f} ms   max {samples[-1] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--lang', default='eng')
+    args = parser.parse_args()
+
+    engine = OcrEngine()
+    engine.cache = None  # 只测后端本身的识别耗时
+    engine.extract_text(render_sample(), args.lang)  # 确保语言文件已下载
+    img = render_sample()
+
+    print(f"OCR of a {img.size[0]}x{img.size[1]} image, {args.frames} frames per backend")
+    run(PytesseractBackend(), img, args.lang, args.frames)
+    try:
+        backend = TesserocrBackend(engine.tessdata_dir)
+    except RuntimeError as e:
+        print(f"tesserocr     skipped: {e}")
+        return
+    run(backend, img, args.lang, args.frames)
+    backend.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+'''
+录制与回放基准：把录制的截图帧离线送入 变化检测 → OCR → 翻译，翻译请求发往本地替身服务，
+不依赖 Qt、屏幕和外网，可以在同一份录制上对比不同优化
+
+用法:
+    python benchmarks/replay.py record recordings/game --rect 0 0 800 300 --seconds 30
+    python benchmarks/replay.py synth recordings/synth [--frames 150]
+    python benchmarks/replay.py replay recordings/game [--speed 1] [--delay 0.05] [--no-detector] [--no-band-ocr] [--no-regions]
+
+也可以在运行程序时设置 RECORD_FRAMES=<目录>，录制翻译窗口实际截到的帧。
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'core'))
+
+import numpy as np
+
+from bench_capture import Rect
+from bench_ocr import render_sample
+from stub_server import StubHandler, start_server
+from BandOcr import BandOcr
+from FrameChangeDetector import FrameChangeDetector
+from FrameRecorder import FrameRecorder, read_recording
+from Metrics import Histogram
+from OcrEngine import OcrEngine
+from ScreenCapture import Frame, ScreenCapture
+from SegmentTranslator import SegmentTranslator
+from TextRegionDetector import TextRegionDetector
+from TranslationCache import TranslationCache
+from TranslatorEngine import TranslatorEngine
+
+SUBTITLES = [
+    ["Where did you put the map?", "I left it by the fire."],
+    ["We should leave before sunrise.", "The guards change shift at dawn."],
+    ["Press START to continue your adventure."],
+    ["Player2: anyone up for another round?", "Player3: sure, give me a minute."],
+]
+
+
+def record(args):
+    recorder = FrameRecorder(args.directory)
+    capture = ScreenCapture(recorder=recorder)
+    rect = Rect(*args.rect)
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        capture.capture_area(rect)
+        time.sleep(args.interval)
+    recorder.close()
+    print(f"Recorded {recorder.frames} frames to {args.directory}")
+
+
+def synth(args):
+    """生成一份合成录制：字幕每隔 hold 帧切换一次，中间是静止画面"""
+    recorder = FrameRecorder(args.directory)
+    start = time.time()
+    for i in range(args.frames):
+        lines = SUBTITLES[(i // args.hold) % len(SUBTITLES)]
+        rgb = np.asarray(render_sample(lines))
+        bgra = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+        bgra[..., 0], bgra[..., 1], bgra[..., 2], bgra[..., 3] = rgb[..., 2], rgb[..., 1], rgb[..., 0], 255
+        recorder.record(Frame(bgra.tobytes(), bgra.shape[1], bgra.shape[0], start + i * args.interval))
+    recorder.close()
+    print(f"Wrote {recorder.frames} synthetic frames to {args.directory}")
+
+
+def count_backend_calls(ocr):
+    """统计实际交给 OCR 后端（Tesseract）的识别次数，命中 OCR 缓存和条带缓存的不计入"""
+    calls = {'count': 0}
+    backend = ocr.backend
+    for method in ('image_to_string', 'image_to_data'):
+        recognize = getattr(backend, method)
+
+        def counted(*args, _recognize=recognize, **kwargs):
+            calls['count'] += 1
+            return _recognize(*args, **kwargs)
+        setattr(backend, method, counted)
+    return calls
+
+
+def replay(args):
+    server, base_url = start_server(delay=args.delay)
+    served_before = StubHandler.requests_served
+    engine = TranslatorEngine(youdao_url=f"{base_url}/api")
+    cache_dir = tempfile.mkdtemp(prefix='replay-cache-')
+    cache = TranslationCache(db_path=os.path.join(cache_dir, 'cache.sqlite3'))
+    segment_translator = SegmentTranslator(
+        lambda texts, src, dest, cancel_token=None: engine.translate_batch(texts, src, dest, provider='youdao', cancel_token=cancel_token),
+        cache)
+    ocr = OcrEngine()
+    backend_calls = count_backend_calls(ocr)
+    band_ocr = BandOcr(ocr, region_detector=None if args.no_regions else TextRegionDetector())
+    detector = FrameChangeDetector(threshold=0.002)
+
+    latency = Histogram(window=100000)
+    frames = ocr_frames = translated_frames = 0
+    last_text = ""
+    first_timestamp = replay_start = None
+    for frame in read_recording(args.directory):
+        if args.speed > 0:
+            # 按录制时的节奏送帧
+            if first_timestamp is None:
+                first_timestamp, replay_start = frame.timestamp, time.monotonic()
+            wait = (frame.timestamp - first_timestamp) / args.speed - (time.monotonic() - replay_start)
+            if wait > 0:
+                time.sleep(wait)
+
+        frames += 1
+        start = time.perf_counter()
+        if not args.no_detector and not detector.has_changed(frame):
+            latency.observe(time.perf_counter() - start)
+            continue
+        ocr_frames += 1
+        if args.no_band_ocr:
+            text = ocr.extract_text(frame, args.lang)
+        else:
+            text = band_ocr.extract_text(frame, args.lang)
+        if text and text.strip() != last_text:
+            last_text = text.strip()
+            segment_translator.translate(text, args.src, args.dest)
+            translated_frames += 1
+        latency.observe(time.perf_counter() - start)
+
+    server.shutdown()
+    if not frames:
+        print(f"No frames found in {args.directory}")
+        return
+
+    s = latency.snapshot()
+    bands = band_ocr.stats()
+    ocr_calls = backend_calls['count']
+    ocr_calls_full = frames if args.no_band_ocr else bands['bands_total'] * frames / max(1, ocr_frames)
+    print(f"Replayed {frames} frames from {args.directory}"
+          f" (detector {'off' if args.no_detector else 'on'}, band OCR {'off' if args.no_band_ocr else 'on'},"
+          f" text regions {'off' if args.no_regions or args.no_band_ocr else 'on'})")
+    print(f"  per-frame latency   p50 {s['p50'] * 1000:8.1f} ms   p95 {s['p95'] * 1000:8.1f} ms   p99 {s['p99'] * 1000:8.1f} ms")
+    print(f"  frames OCRed        {ocr_frames} ({frames - ocr_frames} skipped by change detection)")
+    print(f"  OCR calls           {ocr_calls} (about {max(0, ocr_calls_full - ocr_calls):.0f} avoided)")
+    if not args.no_band_ocr:
+        print(f"  text region area    {bands['region_area_ratio']:.1%} of the captured area"
+              f" ({bands['area_ocr_ratio']:.1%} actually OCRed after band cache hits)")
+    print(f"  frames translated   {translated_frames}")
+    print(f"  translation calls   {StubHandler.requests_served - served_before} for {segment_translator.stats()['segments_translated']} segments")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('record', help='record frames from a screen region')
+    p.add_argument('directory')
+    p.add_argument('--rect', type=int, nargs=4, metavar=('LEFT', 'TOP', 'WIDTH', 'HEIGHT'), default=(0, 0, 800, 300))
+    p.add_argument('--seconds', type=float, default=30)
+    p.add_argument('--interval', type=float, default=0.1)
+    p.set_defaults(fn=record)
+
+    p = commands.add_parser('synth', help='write a synthetic subtitle recording')
+    p.add_argument('directory')
+    p.add_argument('--frames', type=int, default=150)
+    p.add_argument('--hold', type=int, default=15, help='frames each subtitle stays on screen')
+    p.add_argument('--interval', type=float, default=0.1)
+    p.set_defaults(fn=synth)
+
+    p = commands.add_parser('replay', help='replay a recording through OCR and translation')
+    p.add_argument('directory')
+    p.add_argument('--speed', type=float, default=0, help='1 = recorded pace, 0 = as fast as possible')
+    p.add_argument('--delay', type=float, default=0.05, help='simulated provider latency in seconds')
+    p.add_argument('--lang', default='eng')
+    p.add_argument('--src', default='en')
+    p.add_argument('--dest', default='zh-cn')
+    p.add_argument('--no-detector', action='store_true', help='OCR every frame')
+    p.add_argument('--no-band-ocr', action='store_true', help='OCR whole frames instead of cached text bands')
+    p.add_argument('--no-regions', action='store_true', help='OCR full-width bands instead of detected text regions')
+    p.set_defaults(fn=replay)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+'''
+本地翻译服务替身：接口与有道翻译 API 兼容，用于基准测试，不访问外网
+
+用法: python benchmarks/stub_server.py [--port 8765] [--delay 0.05]
+      然后设置 YOUDAO_API_URL=http://127.0.0.1:8765/api
+'''
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+def fake_translate(text, dest):
+    """确定性的“译文”，同一输入总是得到同一输出"""
+    return f"[{dest}] {text}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    disable_nagle_algorithm = True  # 否则 keep-alive 连接上会出现 40ms 的延迟确认
+    delay = 0.0
+    requests_served = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        with StubHandler.lock:
+            StubHandler.requests_served += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        queries = form.get('q', [''])
+        dest = form.get('to', ['zh-CHS'])[0]
+        if self.path.rstrip('/').endswith('/v2/api'):
+            # 批量接口：每个 q 对应 translateResults 中的一项
+            body = {
+                'errorCode': '0',
+                'translateResults': [{'query': q, 'translation': fake_translate(q, dest)} for q in queries],
+            }
+            self._send_json(body)
+            return
+
+        body = {
+            'errorCode': '0',
+            'query': queries[0],
+            'translation': [fake_translate(queries[0], dest)],
+        }
+        self._send_json(body)
+
+    def _send_json(self, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=0, delay=0.0):
+    """在后台线程启动服务，返回 (server, base_url)"""
+    handler = type('Handler', (StubHandler,), {'delay': delay})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='stub-translation-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='simulated provider latency in seconds')
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, args.delay)
+    print(f"Stub translation server listening on {base_url}/api")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+自适应截图调度：画面变化后快速轮询，画面静止时指数退避，浮窗隐藏/拖动/被遮挡时暂停
+'''
+import logging
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class AdaptiveScheduler(QObject):
+    # 后台线程通过该信号报告本次截图是否有变化（跨线程自动排队到主线程）
+    activity = pyqtSignal(bool)
+
+    def __init__(self, callback, should_pause=None, min_interval=100, max_interval=2000,
+                 initial_interval=500, backoff=1.5, pause_poll=300, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+        self.should_pause = should_pause or (lambda: False)
+        self.min_interval = min_interval  # 毫秒
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.pause_poll = pause_poll  # 暂停时检查是否可以恢复的间隔
+        self.interval = initial_interval
+        self.paused = False
+        self.ticks = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+        self.activity.connect(self.notify_activity)
+
+    def start(self):
+        self.interval = self.initial_interval
+        self.timer.start(0)
+
+    def stop(self):
+        self.timer.stop()
+
+    def isActive(self):
+        return self.timer.isActive()
+
+    def notify_activity(self, changed):
+        """有变化时立即回到最短间隔，否则逐步拉长间隔"""
+        if changed:
+            self.interval = self.min_interval
+            # 结果是异步报告的，此时下一次截图可能已按较长间隔排好，提前到最短间隔
+            if self.timer.isActive() and not self.paused and self.timer.remainingTime() > self.min_interval:
+                self.timer.start(self.min_interval)
+        else:
+            self.interval = min(self.max_interval, int(self.interval * self.backoff))
+
+    def _on_timeout(self):
+        if self.should_pause():
+            if not self.paused:
+                logging.debug("Capture paused")
+            self.paused = True
+            self.timer.start(self.pause_poll)
+            return
+
+        if self.paused:
+            # 恢复后画面很可能已经变化，先快速检查一次
+            self.paused = False
+            self.interval = self.min_interval
+        self.ticks += 1
+        try:
+            self.callback()
+        finally:
+            self.timer.start(self.interval)
+
+
+def widget_inactive(widget):
+    """浮窗不存在、被隐藏、最小化、正在拖动或完全被遮挡（窗口未暴露）时返回 True"""
+    if widget is None or not widget.isVisible() or widget.isMinimized():
+        return True
+    if getattr(widget, 'dragging', False):
+        return True
+    handle = widget.windowHandle()
+    return handle is not None and not handle.isExposed()
@@ -0,0 +1,79 @@
+'''
+asyncio 翻译接口：多个请求并发执行，共用 TranslatorEngine 的连接池、路由和限流
+'''
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from TranslatorEngine import TranslatorEngine
+
+
+class AsyncTranslatorEngine:
+    """TranslatorEngine 的异步封装
+
+    googletrans 和 requests 都是阻塞接口，这里把每个打包好的请求放到线程池中执行，
+    由 asyncio 负责并发调度；并发数和速率上限由 TranslatorEngine.limiters 统一控制，
+    同步接口和异步接口共用同一份额度。
+    """
+
+    def __init__(self, engine=None, max_workers=8):
+        self.engine = engine or TranslatorEngine()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-translate')
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+    async def translate(self, text, src='en', dest='zh-cn', provider=None, deadline=None, cancel_token=None):
+        results = await self.translate_many([text], src, dest, provider, deadline, cancel_token)
+        return results[0]
+
+    async def translate_many(self, texts, src='en', dest='zh-cn', provider=None, deadline=None, cancel_token=None):
+        """并发翻译多段文本，返回与 texts 一一对应的译文；所有请求共用同一个截止时间"""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        deadline = self.engine.resolve_deadline(deadline)
+        batches = self.engine.split_batches(texts, provider)
+        tasks = [
+            loop.run_in_executor(
+                self._executor,
+                functools.partial(self.engine.translate_batch, [texts[i] for i in batch], src, dest, provider,
+                                  deadline=deadline, cancel_token=cancel_token),
+            )
+            for batch in batches
+        ]
+        logging.debug(f"Async translation of {len(texts)} segments in {len(batches)} concurrent request(s)")
+
+        results = [None] * len(texts)
+        for batch, translations in zip(batches, await asyncio.gather(*tasks)):
+            for i, translation in zip(batch, translations):
+                results[i] = translation
+        return results
+
+    ########### 同步封装（供 Qt 界面线程之外的工作线程调用） ##############
+
+    def _ensure_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name='async-translate-loop', daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def translate_many_sync(self, texts, src='en', dest='zh-cn', provider=None, deadline=None, cancel_token=None):
+        future = asyncio.run_coroutine_threadsafe(
+            self.translate_many(texts, src, dest, provider, deadline, cancel_token), self._ensure_loop())
+        return future.result()
+
+    def translate_sync(self, text, src='en', dest='zh-cn', provider=None, deadline=None, cancel_token=None):
+        return self.translate_many_sync([text], src, dest, provider, deadline, cancel_token)[0]
+
+    def close(self):
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join(timeout=1)
+                self._loop = None
+        self._executor.shutdown(wait=False)
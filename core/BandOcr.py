@@ -0,0 +1,217 @@
+'''
+按文字行（水平条带）增量识别：只对像素发生变化的条带重新 OCR，其余条带的结果来自缓存
+配置了 TextRegionDetector 时只识别检测到的文字区域，而不是整行宽度的条带
+需要识别的条带较多（或后端每次识别都要启动进程）时，把这些条带拼成一张图只识别一次，结果同样按条带缓存
+'''
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+class BandOcr:
+    """把选区切成水平文字条带，按条带内容哈希缓存 OCR 结果
+
+    条带哈希只取决于像素内容，与条带所在位置无关，所以滚动的聊天记录中
+    上移的旧行同样可以命中缓存。
+    """
+
+    def __init__(self, ocr_engine, ink_tolerance=40, min_gap=3, min_height=6, padding=4, cache_size=512, psm=6,
+                 region_detector=None, line_psm=7, min_conf=None, max_band_calls=8):
+        self.ocr = ocr_engine
+        self.ink_tolerance = ink_tolerance  # 与背景亮度差超过该值的像素视为文字
+        self.min_gap = min_gap  # 小于该高度的空白行不切分
+        self.min_height = min_height  # 忽略过矮的条带（噪点、分隔线）
+        self.padding = padding  # 条带上下保留的背景边距
+        self.cache_size = cache_size
+        self.psm = psm  # 条带内可能有多行紧挨着的文字，使用 uniform block 模式
+        self.region_detector = region_detector
+        self.line_psm = line_psm  # 检测到的单行文字区域使用 single line 模式
+        self.min_conf = min_conf  # 设置后逐词识别，丢弃置信度低于该值的词（背景纹理识别出的乱码）
+        # 需要识别的条带超过该数量时，把它们拼成一张图只识别一次；
+        # pytesseract 每次识别启动一个进程，多于一个条带就拼接
+        self.max_band_calls = max_band_calls
+        self.band_gap = 2 * padding + min_gap + 1  # 拼接时条带之间的空白，保证 Tesseract 按不同的行识别
+        self.ocr_calls = 0  # 实际调用 OCR 后端的次数
+        self.combined_ocr = 0
+        self.bands_total = 0
+        self.bands_ocr = 0
+        self.pixels_total = 0
+        self.pixels_regions = 0  # 检测出的文字区域（条带）的像素数，包括命中缓存的
+        self.pixels_ocr = 0  # 缓存未命中、实际交给 OCR 的像素数
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_gray(img):
+        if hasattr(img, 'gray'):
+            return img.gray()
+        return np.asarray(img.convert('L'), dtype=np.uint8)
+
+    def split_bands(self, gray):
+        """返回 [(top, bottom), ...]，按从上到下的阅读顺序"""
+        background = int(np.median(gray))
+        ink = np.abs(gray.astype(np.int16) - background) > self.ink_tolerance
+        rows = np.flatnonzero(ink.any(axis=1))
+        if rows.size == 0:
+            return []
+
+        # 相邻文字行之间的空白小于 min_gap 时视为同一条带
+        breaks = np.flatnonzero(np.diff(rows) > self.min_gap)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+
+        height = gray.shape[0]
+        bands = []
+        for top, bottom in zip(starts, ends):
+            if bottom - top < self.min_height:
+                continue
+            bands.append((max(0, int(top) - self.padding), min(height, int(bottom) + self.padding)))
+        return bands
+
+    def regions(self, gray):
+        """返回 [(top, bottom, left, right, psm), ...]，按阅读顺序"""
+        if self.region_detector is None:
+            width = gray.shape[1]
+            return [(top, bottom, 0, width, self.psm) for top, bottom in self.split_bands(gray)]
+
+        boxes = self.region_detector.detect(gray)
+        if not boxes:
+            return []
+        # 检测器已经按行间空白切分，高度接近中位数的区域是单行文字
+        line_height = float(np.median([bottom - top for top, bottom, _, _ in boxes]))
+        return [(top, bottom, left, right, self.line_psm if bottom - top <= 1.6 * line_height else self.psm)
+                for top, bottom, left, right in boxes]
+
+    def _band_key(self, band, lang, psm):
+        digest = hashlib.blake2b(band.tobytes(), digest_size=16)
+        digest.update(f"{band.shape}|{lang}|{psm}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def extract_text(self, img, lang='eng'):
+        gray = self._to_gray(img)
+        regions = self.regions(gray)
+        keys = []
+        missing = {}  # 缓存键 -> (条带像素, psm)；同一帧中内容相同的条带只识别一次
+        recognized = {}
+        for top, bottom, left, right, psm in regions:
+            band = np.ascontiguousarray(gray[top:bottom, left:right])
+            key = self._band_key(band, lang, psm)
+            keys.append(key)
+            with self._lock:
+                text = self._cache.get(key)
+                if text is not None:
+                    self._cache.move_to_end(key)
+                    recognized[key] = text
+                elif key not in missing:
+                    missing[key] = (band, psm)
+
+        if len(missing) > self._band_call_limit():
+            self._extract_combined(missing, recognized, gray, lang)
+            missing_groups = []
+        else:
+            missing_groups = sorted({psm for _, psm in missing.values()})
+
+        # 缓存未命中的条带一起并行识别（按页面分割模式分组）
+        for psm in missing_groups:
+            group = [key for key, (_, band_psm) in missing.items() if band_psm == psm]
+            images = [Image.fromarray(missing[key][0]) for key in group]
+            if self.min_conf is None:
+                results = self.ocr.extract_text_batch(images, lang, psm=psm)
+            else:
+                results = self.ocr.extract_data_batch(images, lang, psm=psm, min_conf=self.min_conf)
+            with self._lock:
+                self.ocr_calls += len(group)
+            for key, result in zip(group, results):
+                if result.error is not None:
+                    raise result.error
+                if result.text is None:
+                    continue
+                text = result.text if self.min_conf is None else result.text.text
+                self._remember(key, text.strip(), recognized)
+
+        # 同一行中的多个区域用空格连接，不同行换行
+        lines = []
+        line_top = line_bottom = -1
+        for (top, bottom, _, _, _), key in zip(regions, keys):
+            text = recognized.get(key)
+            if not text:
+                continue
+            if lines and line_top <= (top + bottom) / 2 <= line_bottom:
+                lines[-1] += ' ' + text
+            else:
+                lines.append(text)
+                line_top, line_bottom = top, bottom
+        ocr_count = len(missing)
+
+        with self._lock:
+            self.bands_total += len(regions)
+            self.bands_ocr += ocr_count
+            self.pixels_total += gray.size
+            self.pixels_regions += sum((bottom - top) * (right - left) for top, bottom, left, right, _ in regions)
+            self.pixels_ocr += sum(band.size for band, _ in missing.values())
+        logging.debug(f"Band OCR: {ocr_count}/{len(regions)} band(s) re-recognized")
+        return '\n'.join(lines)
+
+    def _band_call_limit(self):
+        backend = getattr(self.ocr, 'backend', None)
+        return self.max_band_calls if getattr(backend, 'in_process', True) else 1
+
+    def _remember(self, key, text, recognized):
+        recognized[key] = text
+        with self._lock:
+            self._cache[key] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _extract_combined(self, missing, recognized, gray, lang):
+        """把缓存未命中的条带上下拼接成一张图，只调用一次 OCR，再按每一行的位置把结果分回各条带并写入缓存"""
+        keys = list(missing)
+        bands = [missing[key][0] for key in keys]
+        gap = self.band_gap
+        height = sum(band.shape[0] for band in bands) + gap * (len(bands) - 1)
+        width = max(band.shape[1] for band in bands)
+        sheet = np.full((height, width), int(np.median(gray)), dtype=np.uint8)
+        spans = []
+        y = 0
+        for band in bands:
+            sheet[y:y + band.shape[0], :band.shape[1]] = band
+            spans.append((y, y + band.shape[0]))
+            y += band.shape[0] + gap
+
+        data = self.ocr.extract_data(Image.fromarray(sheet), lang, psm=self.psm, min_conf=self.min_conf)
+        with self._lock:
+            self.ocr_calls += 1
+            self.combined_ocr += 1
+        if data is None:
+            return
+
+        # 每一行按中心位置归入所在（或最近）的条带；一个条带内可能有多行
+        texts = [[] for _ in keys]
+        if len(data):
+            starts, ends = np.array(spans, dtype=np.float64).T
+            for text, (_, top, _, line_height) in zip(data.lines(), data.line_boxes()):
+                center = top + line_height / 2
+                distance = np.maximum(starts - center, 0) + np.maximum(center - ends, 0)
+                texts[int(distance.argmin())].append(text)
+        for key, lines in zip(keys, texts):
+            self._remember(key, '\n'.join(lines).strip(), recognized)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'bands_total': self.bands_total,
+                'bands_ocr': self.bands_ocr,
+                'cached_bands': len(self._cache),
+                'ocr_calls': self.ocr_calls,
+                'combined_ocr': self.combined_ocr,
+                'region_area_ratio': self.pixels_regions / self.pixels_total if self.pixels_total else 0.0,
+                'area_ocr_ratio': self.pixels_ocr / self.pixels_total if self.pixels_total else 0.0,
+            }
@@ -8,7 +8,8 @@ from concurrent.futures import ThreadPoolExecutor
 import sys
 import logging
 import time
-from googletrans import Translator
+from TranslationCache import get_shared_cache
+from TranslatorEngine import TranslatorEngine
 
 class SignalHandler(QObject):
     update_translation = pyqtSignal(str)
@@ -63,7 +64,7 @@ class TranslatorApp(QWidget):
         self.last_text = ""
         self.last_process_time = time.time()
         self.process_interval = 0.5
-        self.translation_cache = {}
+        self.translation_cache = get_shared_cache()
         self.thread_pool = ThreadPoolExecutor(max_workers=1)
 
         # 创建信号处理器
@@ -74,7 +75,7 @@ class TranslatorApp(QWidget):
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.resize(450, 200)
 
-        self.translator = Translator()
+        self.translator = TranslatorEngine()
         self.floating_window = FloatingWindow()
 
         self.timer = QTimer(self)
@@ -165,10 +166,10 @@ class TranslatorApp(QWidget):
         target_lang = self.lang_combo.currentText()
         self.logger.info(f"正在翻译文本到 {target_lang}")
 
-        # 检查缓存
-        cache_key = f"{input_text}_{target_lang}"
-        if cache_key in self.translation_cache:
-            self.signal_handler.update_translation.emit(self.translation_cache[cache_key])
+        # 检查缓存（源语言由 Google 自动识别）
+        cached = self.translation_cache.get(input_text, 'auto', target_lang)
+        if cached is not None:
+            self.signal_handler.update_translation.emit(cached)
             return
 
         # 在线程池中执行翻译
@@ -177,12 +178,11 @@ class TranslatorApp(QWidget):
     def translate_in_background(self, text, target_lang):
         """在后台执行翻译"""
         try:
-            result = self.translator.translate(text, dest=target_lang)
-            translated_text = result.text
+            # 与正在进行的相同请求合并，避免重复调用
+            translated_text = self.translator.translate(text, src='auto', dest=target_lang)
 
             # 更新缓存
-            cache_key = f"{text}_{target_lang}"
-            self.translation_cache[cache_key] = translated_text
+            self.translation_cache.put(text, 'auto', target_lang, translated_text)
 
             # 通过信号发送翻译结果到主线程
             self.signal_handler.update_translation.emit(translated_text)
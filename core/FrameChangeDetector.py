@@ -0,0 +1,79 @@
+'''
+画面变化检测：在 OCR 之前判断截图是否有变化，没有变化的帧直接跳过
+'''
+import logging
+import threading
+
+import numpy as np
+from PIL import Image
+
+
+class FrameChangeDetector:
+    """Compare each captured frame with the last processed one on a downsampled grayscale grid.
+
+    A frame counts as changed when the fraction of grid cells whose brightness moved by
+    more than ``pixel_tolerance`` is at least ``threshold``. Skipped frames do not become
+    the reference, so slow changes (typewriter text, fades) accumulate until they are detected.
+    """
+
+    def __init__(self, threshold=0.002, pixel_tolerance=12, max_side=160):
+        self.threshold = threshold  # 变化像素比例阈值
+        self.pixel_tolerance = pixel_tolerance  # 单个像素亮度变化容忍度（0-255）
+        self.max_side = max_side  # 下采样后最长边
+        self.skipped_frames = 0
+        self.processed_frames = 0
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, img):
+        """缩小并转为灰度，返回 uint8 数组"""
+        if hasattr(img, 'gray'):
+            # ScreenCapture.Frame：直接在灰度缓冲区上做块平均，避免生成 PIL 图像
+            gray = img.gray()
+            height, width = gray.shape
+            step = max(1, -(-max(height, width) // self.max_side))
+            h, w = height // step, width // step
+            if h == 0 or w == 0:
+                return gray
+            blocks = gray[:h * step, :w * step].reshape(h, step, w, step)
+            return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+        width, height = img.size
+        scale = min(1.0, self.max_side / float(max(width, height, 1)))
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        small = img.convert('L').resize(size, Image.BILINEAR)
+        return np.asarray(small, dtype=np.uint8)
+
+    def has_changed(self, img):
+        """返回 True 表示需要重新 OCR"""
+        current = self._thumbnail(img)
+        with self._lock:
+            previous = self._previous
+            if previous is None or previous.shape != current.shape:
+                changed = True
+            else:
+                diff = np.abs(current.astype(np.int16) - previous.astype(np.int16))
+                ratio = np.count_nonzero(diff > self.pixel_tolerance) / float(diff.size)
+                changed = bool(ratio >= self.threshold)
+
+            if changed:
+                self._previous = current
+                self.processed_frames += 1
+            else:
+                self.skipped_frames += 1
+        logging.debug(f"Frame changed: {changed} (skipped={self.skipped_frames}, processed={self.processed_frames})")
+        return changed
+
+    def reset(self):
+        """清除上次处理的帧，下一帧一定会被处理（例如切换语言后）"""
+        with self._lock:
+            self._previous = None
+
+    def stats(self):
+        with self._lock:
+            total = self.skipped_frames + self.processed_frames
+            return {
+                'skipped': self.skipped_frames,
+                'processed': self.processed_frames,
+                'skip_ratio': self.skipped_frames / total if total else 0.0,
+            }
@@ -0,0 +1,103 @@
+'''
+录制截图帧（带时间戳），用于离线回放基准测试
+
+录制目录结构：
+    index.jsonl        每行一帧：文件名、时间戳、宽高、截图区域
+    000000.bgra.z      zlib 压缩的原始 BGRA 数据（无损，回放时与截图得到的字节完全一致）
+'''
+import json
+import logging
+import os
+import threading
+import zlib
+
+from ScreenCapture import Frame
+
+
+class FrameRecorder:
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, directory, max_frames=None, compress_level=1):
+        self.directory = directory
+        self.max_frames = max_frames
+        self.compress_level = compress_level
+        self.frames = 0  # 本次录制的帧数
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # 追加写入，同一目录可以分多次录制；文件编号接着已有的录制，不覆盖之前的帧
+        index_path = os.path.join(directory, self.INDEX_FILE)
+        self._next_number = self._existing_frames(index_path)
+        self._index = open(index_path, 'a', encoding='utf-8')
+        if self._next_number and not self._ends_with_newline(index_path):
+            self._index.write('\n')  # 上次录制中断时最后一行可能不完整
+        logging.info(f"🎞️ recording frames to {directory}")
+
+    @staticmethod
+    def _existing_frames(index_path):
+        """已有录制中最大的帧编号 + 1"""
+        if not os.path.exists(index_path):
+            return 0
+        next_number = 0
+        with open(index_path, encoding='utf-8') as index:
+            for line in index:
+                try:
+                    name = json.loads(line)['file']
+                    next_number = max(next_number, int(name.split('.', 1)[0]) + 1)
+                except (ValueError, KeyError, TypeError):
+                    continue  # 空行或中断时写了一半的行
+        return next_number
+
+    @staticmethod
+    def _ends_with_newline(path):
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    @classmethod
+    def from_env(cls):
+        """设置了 RECORD_FRAMES=<目录> 时返回录制器，否则返回 None"""
+        directory = os.getenv('RECORD_FRAMES')
+        return cls(directory) if directory else None
+
+    def record(self, frame, rect=None):
+        with self._lock:
+            if self._index is None or (self.max_frames is not None and self.frames >= self.max_frames):
+                return
+            name = f"{self._next_number:06d}.bgra.z"
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                f.write(zlib.compress(bytes(frame.raw), self.compress_level))
+            entry = {
+                'file': name,
+                'timestamp': frame.timestamp,
+                'width': frame.width,
+                'height': frame.height,
+                'rect': [rect.left(), rect.top(), rect.width(), rect.height()] if rect is not None else None,
+            }
+            self._index.write(json.dumps(entry) + '\n')
+            self._index.flush()
+            self._next_number += 1
+            self.frames += 1
+
+    def close(self):
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+
+def read_recording(directory):
+    """按录制顺序逐帧读取，返回 Frame（timestamp 为录制时的时间）"""
+    with open(os.path.join(directory, FrameRecorder.INDEX_FILE), encoding='utf-8') as index:
+        for line in index:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 录制中断时写了一半的行
+            with open(os.path.join(directory, entry['file']), 'rb') as f:
+                raw = zlib.decompress(f.read())
+            yield Frame(raw, entry['width'], entry['height'], entry['timestamp'])
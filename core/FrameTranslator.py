@@ -0,0 +1,108 @@
+'''
+OCR → 翻译 两个流水线阶段（不依赖 Qt），界面进程内的流水线和 OCR 工作进程共用
+'''
+import logging
+import os
+
+from AsyncTranslator import AsyncTranslatorEngine
+from BandOcr import BandOcr
+from LanguageDetector import LanguageDetector, translator_code
+from OcrEngine import OcrEngine
+from Pipeline import Stage
+from SegmentTranslator import SegmentTranslator
+from TextRegionDetector import TextRegionDetector
+from TranslationCache import get_shared_cache
+from TranslationErrors import Deadline, TranslationError, TranslationTimeout, TranslationCancelled
+from TranslatorEngine import TranslatorEngine
+
+
+def ocr_min_conf():
+    """环境变量 OCR_MIN_CONF：丢弃置信度低于该值的词（0~100，默认 30，0 表示不过滤）"""
+    min_conf = float(os.getenv('OCR_MIN_CONF', '30'))
+    return min_conf if min_conf > 0 else None
+
+
+class FrameTranslator:
+    def __init__(self, translation_timeout=8.0, on_failure=None):
+        self.ocr = OcrEngine()
+        self.band_ocr = BandOcr(self.ocr, region_detector=TextRegionDetector(), min_conf=ocr_min_conf())
+        self.language_detector = LanguageDetector(self.ocr, region_detector=self.band_ocr.region_detector)
+        self.translator = TranslatorEngine()
+        self.async_translator = AsyncTranslatorEngine(self.translator)
+        self.translation_cache = get_shared_cache()
+        self.segment_translator = SegmentTranslator(self.translate_segments, self.translation_cache, fuzzy=True)
+        self.translation_timeout = translation_timeout  # 单帧翻译的截止时间（秒）
+        self.on_failure = on_failure  # 翻译失败时调用，例如重置变化检测以便下一帧重试
+        self.last_ocr_text = ""
+
+    def stages(self):
+        return [
+            # OCR 一旦开始就让它跑完：背景持续变化时每帧都取消会让 OCR 和翻译永远完成不了，
+            # 排队中的旧帧仍会被新帧替换
+            Stage('ocr', self.ocr_stage, cancel_superseded=False),
+            Stage('translate', self.translate_stage),
+        ]
+
+    def register_metrics(self, metrics):
+        metrics.register_collector('translation_cache', self.translation_cache.stats)
+        metrics.register_collector('band_ocr', self.band_ocr.stats)
+        if self.ocr.cache is not None:
+            metrics.register_collector('ocr_cache', self.ocr.cache.stats)
+        metrics.register_collector('language_detection', self.language_detector.stats)
+        metrics.register_collector('segments', self.segment_translator.stats)
+        metrics.register_collector('provider', self.translator.router.stats, label='provider')
+        metrics.register_collector('single_flight', self.translator.single_flight.stats)
+
+    def reset(self):
+        """切换语言后即使文字不变也需要重新翻译"""
+        self.last_ocr_text = ""
+        self.language_detector.reset()
+
+    def ocr_stage(self, job):
+        """识别文字，文字没有变化时不再翻译；源语言为 auto 时按选区自动检测"""
+        lang = job.context['src_lang']
+        if lang == 'auto':
+            lang = self.language_detector.detect(job.value, job.context.get('region'))
+            # 翻译阶段使用检测出的语言；组合语言（无法区分）时交给翻译服务自动识别
+            job.context['src_lang_code'] = translator_code(lang)
+        text = self.band_ocr.extract_text(job.value, lang)
+        if not text:
+            logging.info("❌ OCR failed to extract text")
+            return None
+
+        if job.cancelled:
+            # 结果会被流水线丢弃，不能记为已翻译，否则新帧识别出相同文字时会被跳过
+            return None
+        current_text = text.strip()
+        if current_text == self.last_ocr_text:
+            return None
+        self.last_ocr_text = current_text
+        return text
+
+    def translate_stage(self, job):
+        """翻译文字，返回 (原文, 译文, 提交时间)"""
+        text = job.value
+        src_lang_code = job.context['src_lang_code']
+        dest_lang_code = job.context['dest_lang_code']
+        submitted_at = job.context.get('submitted_at')
+
+        # 只翻译缓存中没有的句子/行
+        try:
+            translation = self.segment_translator.translate(text, src_lang_code, dest_lang_code, cancel_token=job)
+        except TranslationCancelled:
+            return None
+        except TranslationError as e:
+            # 错误只显示不缓存；通知截图端重置变化检测，下一帧重新尝试
+            logging.error(f"Translation error: {str(e)}")
+            self.last_ocr_text = ""
+            if self.on_failure is not None:
+                self.on_failure()
+            if isinstance(e, TranslationTimeout):
+                return text, "translation timed out", submitted_at
+            return text, f"translation failure: {str(e)}", submitted_at
+        return text, translation, submitted_at
+
+    def translate_segments(self, texts, src, dest, cancel_token=None):
+        """批量翻译多个片段，超过单次请求限制时并发发送多个请求"""
+        return self.async_translator.translate_many_sync(
+            texts, src=src, dest=dest, deadline=Deadline(self.translation_timeout), cancel_token=cancel_token)
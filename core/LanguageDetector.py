@@ -0,0 +1,179 @@
+'''
+自动识别选区文字的语言：用几种候选语言各识别一次样本，按置信度和识别结果的文字系统打分
+
+检测结果按选区缓存，只有画面内容大幅变化（换了场景或界面）时才重新检测；
+得分最高的两种语言难以区分时返回组合语言（例如 eng+jpn），由 Tesseract 同时使用两个模型。
+'''
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from OcrPreprocessor import to_gray
+
+# 各语言的识别结果应当由哪些字符组成；用错模型时 Tesseract 常输出高置信度的其他文字系统的乱码
+LATIN = r'A-Za-z\u00c0-\u024f'
+HAN = r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+KANA = r'\u3040-\u30ff\uff66-\uff9f'
+HANGUL = r'\u1100-\u11ff\u3130-\u318f\uac00-\ud7af'
+LANG_SCRIPTS = {
+    'eng': re.compile(f'[{LATIN}]'),
+    'fra': re.compile(f'[{LATIN}]'),
+    'deu': re.compile(f'[{LATIN}]'),
+    'spa': re.compile(f'[{LATIN}]'),
+    'chi_sim': re.compile(f'[{HAN}]'),
+    'chi_tra': re.compile(f'[{HAN}]'),
+    'jpn': re.compile(f'[{KANA}{HAN}]'),
+    'kor': re.compile(f'[{HANGUL}]'),
+}
+
+# OCR 语言到翻译语言代码；组合语言交给翻译服务自动识别
+TRANSLATOR_CODES = {
+    'chi_sim': 'zh-cn',
+    'chi_tra': 'zh-tw',
+    'eng': 'en',
+    'jpn': 'ja',
+    'kor': 'ko',
+    'fra': 'fr',
+    'deu': 'de',
+    'spa': 'es',
+}
+
+
+def translator_code(lang):
+    return TRANSLATOR_CODES.get(lang, 'auto')
+
+
+def script_score(data, lang):
+    """平均置信度 × 符合该语言文字系统的字符比例"""
+    if not len(data):
+        return 0.0
+    chars = [ch for ch in ''.join(data.words) if ch.isalnum()]
+    if not chars:
+        return 0.0
+    pattern = LANG_SCRIPTS[lang]
+    ratio = sum(1 for ch in chars if pattern.match(ch)) / len(chars)
+    return float(data.conf.mean()) * ratio
+
+
+class LanguageDetector:
+    def __init__(self, ocr_engine, candidates=('eng', 'chi_sim', 'jpn', 'kor'), region_detector=None,
+                 margin=8.0, min_score=30.0, change_threshold=16.0, default='eng', max_regions=32,
+                 empty_retry_interval=2.0):
+        self.ocr = ocr_engine
+        self.candidates = candidates
+        self.region_detector = region_detector  # 设置后只用面积最大的文字区域作为样本，识别更快
+        self.margin = margin  # 前两名得分相差不到 margin 时视为无法区分，使用组合语言
+        self.min_score = min_score  # 最高得分低于该值时认为没有可识别的文字
+        self.change_threshold = change_threshold  # 缩略图平均亮度差超过该值时重新检测
+        # 没有文字的选区：画面有变化（可能出现了文字）也最多每隔这么多秒重新检测一次
+        self.empty_retry_interval = empty_retry_interval
+        self.default = default
+        self.max_regions = max_regions
+        self.detections = 0
+        self.cache_hits = 0
+        self.ambiguous = 0
+        self._unavailable = set()  # 训练数据无法获取（例如离线时未下载）的候选语言，不再参与检测
+        self._regions = OrderedDict()  # region -> (缩略图, 语言, 是否检测到文字, 检测时间)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _thumbnail(gray):
+        return np.asarray(Image.fromarray(gray).resize((32, 32), Image.BOX), dtype=np.float32)
+
+    def _sample(self, img, gray):
+        if self.region_detector is None:
+            return img
+        boxes = self.region_detector.detect(gray)
+        if not boxes:
+            return img
+        top, bottom, left, right = max(boxes, key=lambda box: (box[1] - box[0]) * (box[3] - box[2]))
+        return Image.fromarray(np.ascontiguousarray(gray[top:bottom, left:right]))
+
+    def detect(self, img, region=None):
+        """返回 img 的 OCR 语言；region 为选区标识（例如屏幕坐标），同一选区复用上次的结果"""
+        gray = to_gray(img)
+        thumbnail = self._thumbnail(gray)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._regions.get(region)
+            if cached is not None and self._reusable(cached, thumbnail, now):
+                self._regions.move_to_end(region)
+                self.cache_hits += 1
+                return cached[1]
+
+        lang = self._detect(self._sample(img, gray))
+        with self._lock:
+            self.detections += 1
+            if lang is None:
+                # 没有可识别的文字：沿用之前的结果，同样缓存，避免空白选区每帧都用所有候选语言识别一遍
+                previous = cached[1] if cached is not None else self.default
+                self._regions[region] = (thumbnail, previous, False, now)
+            else:
+                self._regions[region] = (thumbnail, lang, True, now)
+            self._regions.move_to_end(region)
+            while len(self._regions) > self.max_regions:
+                self._regions.popitem(last=False)
+            return self._regions[region][1]
+
+    def _reusable(self, cached, thumbnail, now):
+        thumbnail_before, _, has_text, checked_at = cached
+        difference = np.abs(thumbnail - thumbnail_before).mean()
+        if has_text:
+            return difference <= self.change_threshold
+        # 空白选区中出现一行字幕时缩略图变化很小，只要有变化就按时间间隔重新检测
+        return difference < 1.0 or now - checked_at < self.empty_retry_interval
+
+    def _usable_candidates(self):
+        candidates = []
+        for lang in self.candidates:
+            if lang in self._unavailable:
+                continue
+            try:
+                self.ocr.ensure_language(lang)
+            except Exception as e:
+                with self._lock:
+                    self._unavailable.add(lang)
+                logging.warning(f"⚠️ language detection skips '{lang}': {e}")
+                continue
+            candidates.append(lang)
+        if not candidates:
+            raise Exception(f"❌ no OCR language available for detection: {self.candidates}")
+        return candidates
+
+    def _detect(self, sample):
+        candidates = self._usable_candidates()
+        results = self.ocr.extract_data_languages(sample, candidates, psm=6)
+        scores = sorted(((script_score(result.text, lang) if result.text is not None else 0.0, lang)
+                         for lang, result in zip(candidates, results)), reverse=True)
+        logging.debug(f"Language detection scores: {scores}")
+        (best, best_lang), (second, second_lang) = scores[0], scores[1] if len(scores) > 1 else (0.0, None)
+        if best < self.min_score:
+            return None
+        if second_lang is not None and best - second < self.margin:
+            with self._lock:
+                self.ambiguous += 1
+            lang = f"{best_lang}+{second_lang}"
+        else:
+            lang = best_lang
+        logging.info(f"🌐 detected OCR language: {lang}")
+        return lang
+
+    def reset(self):
+        """清除检测结果，并重新尝试之前无法获取训练数据的语言"""
+        with self._lock:
+            self._regions.clear()
+            self._unavailable.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'detections': self.detections,
+                'cache_hits': self.cache_hits,
+                'ambiguous': self.ambiguous,
+                'regions': len(self._regions),
+            }
@@ -2,11 +2,15 @@
 # 主界面，负责管理整体流程：选区、截图、OCR识别、翻译显示
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QTextEdit, QApplication, QComboBox, QHBoxLayout
-from PyQt5.QtCore import QTimer, QRect
+from PyQt5.QtCore import QRect
 from SelectionOverlay import SelectionWindow
 from ScreenCapture import ScreenCapture
+from FrameChangeDetector import FrameChangeDetector
 from OcrEngine import OcrEngine
+from BandOcr import BandOcr
+from TextRegionDetector import TextRegionDetector
 from TranslatorEngine import TranslatorEngine
+from AdaptiveScheduler import AdaptiveScheduler, widget_inactive
 import logging
 from DraggableOverlay import DraggableOverlay
 
@@ -45,13 +49,16 @@ class MainWindow(QWidget):
         # 保存选中的区域
         self.selected_rect = None
 
-        # 定时器，每隔一段时间截图识别
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.process)
+        # 截图调度：画面变化后加快轮询，静止时退避，浮窗隐藏或拖动时暂停
+        self.timer = AdaptiveScheduler(self.process, lambda: widget_inactive(self.draggable_overlay), parent=self)
 
         # 初始化核心功能模块
         self.capture = ScreenCapture()
+        self.change_detector = FrameChangeDetector()
+        self.src_lang.currentTextChanged.connect(self.change_detector.reset)
+        self.dest_lang.currentTextChanged.connect(self.change_detector.reset)
         self.ocr = OcrEngine()
+        self.band_ocr = BandOcr(self.ocr, region_detector=TextRegionDetector())
         self.translator = TranslatorEngine()
 
         # 初始化浮窗
@@ -124,7 +131,7 @@ class MainWindow(QWidget):
             self.draggable_overlay = DraggableOverlay(rect)
             self.draggable_overlay.show()
             self.show()
-        self.timer.start(500)  # 每秒处理一次
+        self.timer.start()
 
     def process(self):
         if not self.selected_rect:
@@ -134,11 +141,6 @@ class MainWindow(QWidget):
         if not self.selected_rect or not self.draggable_overlay:
             return
 
-        # Don't process if overlay is being dragged
-        if self.draggable_overlay.dragging:
-            logging.debug("Overlay is being dragged, skipping process")
-            return
-
         self.selected_rect = self.draggable_overlay.geometry()
 
         try:
@@ -148,8 +150,14 @@ class MainWindow(QWidget):
                 logging.error("Failed to capture screen area")
                 return
 
+            # Skip OCR when the region did not change
+            changed = self.change_detector.has_changed(img)
+            self.timer.notify_activity(changed)
+            if not changed:
+                return
+
             # OCR recognition
-            text = self.ocr.extract_text(img, self.languages[self.src_lang.currentText()])
+            text = self.band_ocr.extract_text(img, self.languages[self.src_lang.currentText()])
             if not text:
                 logging.debug("OCR result is empty")
                 return
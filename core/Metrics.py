@@ -0,0 +1,246 @@
+'''
+各阶段耗时统计：滚动窗口内的 p50/p95/p99、吞吐量和错误计数，
+可以导出为 Prometheus 文本格式（写文件或本地 HTTP 端口）
+'''
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Histogram:
+    """保留最近 window 次耗时（秒）的滚动直方图"""
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, window=1024, rate_window=60.0):
+        self.rate_window = rate_window
+        self._samples = deque(maxlen=window)
+        self._timestamps = deque()
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append(seconds)
+            self._timestamps.append(now)
+            self._trim(now)
+            self.count += 1
+            self.total += seconds
+            if error:
+                self.errors += 1
+
+    def _trim(self, now):
+        while self._timestamps and now - self._timestamps[0] > self.rate_window:
+            self._timestamps.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            samples = sorted(self._samples)
+            result = {
+                'count': self.count,
+                'errors': self.errors,
+                'sum': self.total,
+                'rate': len(self._timestamps) / self.rate_window,  # 每秒次数
+            }
+        for q in self.QUANTILES:
+            result[f'p{int(q * 100)}'] = samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+        return result
+
+
+class _Timing:
+    failed = False
+
+
+class MetricsRegistry:
+    def __init__(self, prefix='screen_translator'):
+        self.prefix = prefix
+        self._histograms = {}
+        self._collectors = {}
+        self._remote = {}  # name -> fn() 返回其他进程的 snapshot()
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            return histogram
+
+    def observe(self, stage, seconds, error=False):
+        self.histogram(stage).observe(seconds, error)
+
+    @contextmanager
+    def timer(self, stage, ignore=()):
+        """记录代码块的耗时；抛出异常（ignore 中的类型除外）或调用者设置 timing.failed 时计为错误"""
+        timing = _Timing()
+        start = time.perf_counter()
+        try:
+            yield timing
+        except BaseException as e:
+            timing.failed = not isinstance(e, ignore)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, timing.failed)
+
+    def register_collector(self, name, fn, label='stage'):
+        """fn() 返回 {指标名: 数值} 或 {标签值: {指标名: 数值}}，例如 TranslationCache.stats / Pipeline.stats"""
+        with self._lock:
+            self._collectors[name] = (fn, label)
+
+    def register_remote(self, name, fn):
+        """fn() 返回其他进程（例如 OCR 工作进程）的 snapshot()，与本进程的耗时统计一起导出"""
+        with self._lock:
+            self._remote[name] = fn
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self._histograms)
+            remote = list(self._remote.values())
+        snapshot = {stage: histogram.snapshot() for stage, histogram in histograms.items()}
+        for fn in remote:
+            for stage, s in fn().items():
+                snapshot.setdefault(stage, s)
+        return dict(sorted(snapshot.items()))
+
+    def collect(self):
+        """调用所有 collector，返回 {name: (values, label)}；结果可以 pickle 后发给其他进程"""
+        with self._lock:
+            collectors = dict(self._collectors)
+        collected = {}
+        for name, (fn, label) in sorted(collectors.items()):
+            try:
+                collected[name] = (fn(), label)
+            except Exception as e:
+                logging.warning(f"⚠️ metrics collector '{name}' failed: {e}")
+        return collected
+
+    def to_prometheus(self):
+        p = self.prefix
+        lines = [
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        snapshot = self.snapshot()
+        for stage, s in snapshot.items():
+            for q in Histogram.QUANTILES:
+                lines.append(f'{p}_stage_seconds{{stage="{stage}",quantile="{q}"}} {s[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        lines.append(f"# TYPE {p}_stage_errors_total counter")
+        for stage, s in snapshot.items():
+            lines.append(f'{p}_stage_errors_total{{stage="{stage}"}} {s["errors"]}')
+
+        for name, (values, label) in self.collect().items():
+            for key, value in sorted(values.items()):
+                if isinstance(value, dict):
+                    # 嵌套的统计（例如流水线每个阶段）转换为带标签的指标
+                    for field, v in sorted(value.items()):
+                        if isinstance(v, (int, float)):
+                            lines.append(f'{p}_{name}_{field}{{{label}="{key}"}} {v}')
+                elif isinstance(value, (int, float)):
+                    lines.append(f'{p}_{name}_{key} {value}')
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """供界面 HUD 显示的简短文本"""
+        return summary_lines(self.snapshot())
+
+
+def summary_lines(snapshot):
+    """把 snapshot()（也可以来自其他进程）格式化为每个阶段一行"""
+    return [
+        f"{stage}: p50 {s['p50'] * 1000:.0f}ms  p95 {s['p95'] * 1000:.0f}ms  "
+        f"{s['rate']:.1f}/s  err {s['errors']}"
+        for stage, s in snapshot.items()
+    ]
+
+
+class MetricsExporter:
+    """定期把指标写到 Prometheus textfile，和/或在 127.0.0.1:port/metrics 提供指标"""
+
+    def __init__(self, registry, path=None, port=None, interval=5.0):
+        self.registry = registry
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        if self.path:
+            self._thread = threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = registry.to_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+            logging.info(f"📈 metrics available at http://127.0.0.1:{self.port}/metrics")
+        return self
+
+    def write(self):
+        # 先写临时文件再替换，避免采集端读到写了一半的文件
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.to_prometheus())
+        os.replace(tmp_path, self.path)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logging.warning(f"⚠️ metrics file write error: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """进程内共用的指标"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+def start_exporter_from_env():
+    """设置了 METRICS_FILE 或 METRICS_PORT 时启动导出，否则返回 None"""
+    path = os.getenv('METRICS_FILE')
+    port = os.getenv('METRICS_PORT')
+    if not path and not port:
+        return None
+    return MetricsExporter(get_metrics(), path=path or None, port=int(port) if port else None).start()
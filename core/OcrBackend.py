@@ -0,0 +1,142 @@
+'''
+OCR 后端：pytesseract（每次调用启动一个 tesseract 进程）或 tesserocr（进程内常驻，模型只加载一次）
+'''
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr 是可选依赖
+    tesserocr = None
+
+
+class BackendInitError(RuntimeError):
+    """后端无法加载语言模型；与单次识别出错不同，调用方应换用其他后端"""
+
+
+class PytesseractBackend:
+    """每次调用都会写临时文件并启动新的 tesseract 进程"""
+    name = 'pytesseract'
+    in_process = False  # 每次识别都有启动进程的固定开销，调用方应尽量合并成一次大的识别
+
+    def image_to_string(self, img, lang, psm=None):
+        config = f'--psm {psm}' if psm is not None else ''
+        return pytesseract.image_to_string(img, lang=lang, config=config)
+
+    def image_to_data(self, img, lang, psm=None):
+        """逐词结果的 TSV 文本（带表头）"""
+        config = f'--psm {psm}' if psm is not None else ''
+        return pytesseract.image_to_data(img, lang=lang, config=config)
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """通过 tesserocr 调用 Tesseract C API，语言模型在多次调用之间保持加载
+
+    TessBaseAPI 不是线程安全的，每次识别从该语言的实例池中借出一个实例独占使用；
+    每种语言最多加载 max_apis_per_lang 个实例，并行识别的线程更多时排队等待，
+    避免线程池 × 候选语言个模型同时驻留内存。
+    """
+    name = 'tesserocr'
+    in_process = True
+
+    def __init__(self, tessdata_dir, max_apis_per_lang=2):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.tessdata_dir = tessdata_dir
+        self.max_apis_per_lang = max_apis_per_lang
+        self._idle = {}  # lang -> 空闲的实例列表
+        self._loaded = {}  # lang -> 已加载（含借出）的实例数
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _load(self, lang):
+        # tesserocr 需要以分隔符结尾的目录
+        path = os.path.join(self.tessdata_dir, '')
+        try:
+            api = tesserocr.PyTessBaseAPI(path=path, lang=lang)
+        except Exception as e:
+            raise BackendInitError(f"failed to load tesserocr model '{lang}': {e}") from e
+        logging.info(f"✅ loaded tesserocr model '{lang}'")
+        return api
+
+    @contextmanager
+    def _api(self, lang):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise BackendInitError("tesserocr backend is closed")
+                idle = self._idle.setdefault(lang, [])
+                if idle:
+                    api = idle.pop()
+                    break
+                if self._loaded.get(lang, 0) < self.max_apis_per_lang:
+                    self._loaded[lang] = self._loaded.get(lang, 0) + 1
+                    api = None
+                    break
+                self._cond.wait()
+        if api is None:
+            try:
+                api = self._load(lang)
+            except BackendInitError:
+                with self._cond:
+                    self._loaded[lang] -= 1
+                    self._cond.notify_all()
+                raise
+        try:
+            yield api
+        finally:
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._idle.setdefault(lang, []).append(api)
+                    self._cond.notify_all()
+            if closed:
+                api.End()
+
+    def image_to_string(self, img, lang, psm=None):
+        with self._api(lang) as api:
+            api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+            api.SetImage(img)
+            return api.GetUTF8Text()
+
+    def image_to_data(self, img, lang, psm=None):
+        """逐词结果的 TSV 文本（不带表头）"""
+        with self._api(lang) as api:
+            api.SetPageSegMode(psm if psm is not None else tesserocr.PSM.AUTO)
+            api.SetImage(img)
+            api.Recognize()
+            return api.GetTSVText(0)
+
+    def close(self):
+        """释放空闲的实例；正在识别的实例在归还时释放"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+            self._cond.notify_all()
+        for apis in idle.values():
+            for api in apis:
+                api.End()
+
+
+def create_backend(tessdata_dir, preferred=None):
+    """按配置创建 OCR 后端，tesserocr 不可用时回退到 pytesseract
+
+    preferred 默认读取环境变量 OCR_BACKEND（'tesserocr' 或 'pytesseract'）。
+    """
+    preferred = preferred or os.getenv('OCR_BACKEND', 'tesserocr')
+    if preferred == 'tesserocr':
+        try:
+            backend = TesserocrBackend(tessdata_dir)
+            logging.info("📦 OCR backend: tesserocr (persistent)")
+            return backend
+        except Exception as e:
+            logging.warning(f"⚠️ tesserocr unavailable ({e}), falling back to pytesseract")
+    logging.info("📦 OCR backend: pytesseract")
+    return PytesseractBackend()
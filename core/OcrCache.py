@@ -0,0 +1,97 @@
+'''
+OCR 结果缓存：按图像内容哈希 + 语言 + 识别参数缓存识别结果（内存 LRU，按条目数和字节数限制大小）
+
+闪烁的对话框、交替出现的字幕、来回切换的菜单页，同样的画面只需要计算一次哈希，不再重复运行 Tesseract。
+'''
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+def image_digest(img):
+    """图像内容的哈希（含尺寸和像素格式），支持 Frame / PIL 图像 / ndarray"""
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(img, 'raw'):  # ScreenCapture.Frame：直接哈希 BGRA 缓冲区，不转换成 PIL 图像
+        digest.update(f"bgra|{img.width}x{img.height}|".encode('utf-8'))
+        digest.update(img.raw)
+    elif isinstance(img, Image.Image):
+        digest.update(f"{img.mode}|{img.size}|".encode('utf-8'))
+        digest.update(img.tobytes())
+    else:
+        array = np.ascontiguousarray(img)
+        digest.update(f"{array.dtype}|{array.shape}|".encode('utf-8'))
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+class OcrCache:
+    def __init__(self, max_entries=512, max_bytes=2 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 只计算键和识别结果的大小，图像本身不保存
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (text, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """环境变量 OCR_CACHE_ENTRIES=0 关闭缓存，返回 None"""
+        max_entries = int(os.getenv('OCR_CACHE_ENTRIES', '512'))
+        if max_entries <= 0:
+            return None
+        return cls(max_entries=max_entries)
+
+    @staticmethod
+    def make_key(img, lang, config=''):
+        """config 为影响识别结果的其他参数，例如页面分割模式和预处理方案"""
+        return f"{image_digest(img)}|{lang}|{config}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, text):
+        """text 为识别出的文字或 OcrData"""
+        size = len(key) + (len(text.encode('utf-8')) if isinstance(text, str) else text.nbytes)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (text, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
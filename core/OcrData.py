@@ -0,0 +1,116 @@
+'''
+逐词 OCR 结果：由 Tesseract 的 TSV 输出（image_to_data / GetTSVText）解析而来，
+按列存放在 NumPy 数组中，而不是每个词一个 dict
+
+后续阶段可以按置信度过滤掉背景纹理识别出的乱码，并按每一行的位置把结果分配给对应的文字条带。
+'''
+import re
+
+import numpy as np
+
+# 相邻两个词都是中文/日文字符时直接拼接，不插入空格（韩文按词书写，保留空格）
+CJK_CHAR = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+TSV_WORD_LEVEL = 5
+
+
+def join_words(words):
+    text = ''
+    for word in words:
+        if text and not (CJK_CHAR.match(text[-1]) and CJK_CHAR.match(word[0])):
+            text += ' '
+        text += word
+    return text
+
+
+class OcrData:
+    """words[i] 的位置为 boxes[i] = (left, top, width, height)，置信度 conf[i]（0~100），
+    所在行的序号 line[i]（按阅读顺序从 0 开始，同一行的词连续排列）
+    """
+
+    def __init__(self, words, boxes, conf, line):
+        self.words = words
+        self.boxes = boxes
+        self.conf = conf
+        self.line = line
+
+    @classmethod
+    def empty(cls):
+        return cls([], np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def from_tsv(cls, tsv):
+        """解析 Tesseract TSV：level page block par line word left top width height conf text
+
+        pytesseract 的输出带表头，tesserocr 的 GetTSVText 没有；只保留非空的词（level 5）。
+        """
+        words, boxes, conf, line_keys = [], [], [], []
+        for row in tsv.splitlines():
+            fields = row.split('\t', 11)
+            if len(fields) < 12 or fields[0] != str(TSV_WORD_LEVEL):
+                continue
+            word = fields[11].strip()
+            if not word:
+                continue
+            words.append(word)
+            boxes.append((int(fields[6]), int(fields[7]), int(fields[8]), int(fields[9])))
+            conf.append(float(fields[10]))
+            line_keys.append((int(fields[1]), int(fields[2]), int(fields[3]), int(fields[4])))
+        if not words:
+            return cls.empty()
+
+        # (page, block, par, line) → 连续的行号
+        keys = np.array(line_keys, dtype=np.int32)
+        new_line = np.ones(len(words), dtype=bool)
+        new_line[1:] = (keys[1:] != keys[:-1]).any(axis=1)
+        line = np.cumsum(new_line, dtype=np.int32) - 1
+        return cls(words, np.array(boxes, dtype=np.int32), np.array(conf, dtype=np.float32), line)
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def nbytes(self):
+        """大致的内存占用，用于缓存的字节预算"""
+        return (sum(len(word.encode('utf-8')) for word in self.words)
+                + self.boxes.nbytes + self.conf.nbytes + self.line.nbytes)
+
+    def filter(self, min_conf):
+        """去掉置信度低于 min_conf 的词；整行都被去掉时该行消失，行号重新编号"""
+        keep = np.flatnonzero(self.conf >= min_conf)
+        if keep.size == len(self.words):
+            return self
+        line = self.line[keep]
+        if keep.size:
+            _, line = np.unique(line, return_inverse=True)
+        return OcrData([self.words[i] for i in keep], self.boxes[keep], self.conf[keep], line.astype(np.int32))
+
+    def scale(self, sx, sy):
+        """把坐标换算回预处理（缩放）之前的图像"""
+        if sx == 1.0 and sy == 1.0:
+            return self
+        boxes = np.rint(self.boxes * np.array([sx, sy, sx, sy])).astype(np.int32)
+        return OcrData(self.words, boxes, self.conf, self.line)
+
+    def _line_starts(self):
+        return np.flatnonzero(np.diff(self.line, prepend=-1)).tolist() + [len(self.words)]
+
+    def lines(self):
+        """每一行的文字"""
+        starts = self._line_starts()
+        return [join_words(self.words[a:b]) for a, b in zip(starts, starts[1:])]
+
+    def line_boxes(self):
+        """每一行的外接矩形 (left, top, width, height)，shape (行数, 4)"""
+        if not self.words:
+            return np.zeros((0, 4), dtype=np.int32)
+        starts = self._line_starts()[:-1]
+        left = np.minimum.reduceat(self.boxes[:, 0], starts)
+        top = np.minimum.reduceat(self.boxes[:, 1], starts)
+        right = np.maximum.reduceat(self.boxes[:, 0] + self.boxes[:, 2], starts)
+        bottom = np.maximum.reduceat(self.boxes[:, 1] + self.boxes[:, 3], starts)
+        return np.stack([left, top, right - left, bottom - top], axis=1)
+
+    @property
+    def text(self):
+        return '\n'.join(self.lines())
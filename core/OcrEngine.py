@@ -4,13 +4,26 @@ import os
 import requests
 from tqdm import tqdm
 import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from TesseractManager import TesseractManager
+from OcrBackend import BackendInitError, PytesseractBackend, create_backend
+from OcrCache import OcrCache
+from OcrData import OcrData
+from OcrPreprocessor import create_preprocessor
+from Metrics import get_metrics
 
 '''
     识别文字
 '''
 
+# 批量识别中每一项的结果；error 不为 None 时 text 为 None（extract_data_batch 中 text 为 OcrData）
+OcrResult = namedtuple('OcrResult', ['text', 'lang', 'seconds', 'error'])
+
+
 class OcrEngine:
     # 语言代码到训练数据文件的映射
     LANG_MAPPINGS = {
@@ -61,6 +74,19 @@ class OcrEngine:
         if os.path.exists(self.tessdata_dir):
             logging.info(f"📄 the exist language file: {[f for f in os.listdir(self.tessdata_dir) if f.endswith('.traineddata')]}")
 
+        # 常驻的 OCR 后端（tesserocr 不可用时使用 pytesseract）
+        self.backend = create_backend(self.tessdata_dir)
+        # 识别前的灰度/反相/缩放/二值化，None 表示直接识别原图
+        self.preprocessor = create_preprocessor()
+        # 按图像内容缓存识别结果，None 表示不缓存
+        self.cache = OcrCache.from_env()
+
+        # 批量识别用的线程池：pytesseract 的子进程和 tesserocr 的识别过程都不占用 GIL
+        self.max_workers = os.cpu_count() or 1
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+
     def _download_language(self, lang_code):
         traineddata_file = self.LANG_MAPPINGS.get(lang_code)
         if not traineddata_file:
@@ -124,7 +150,112 @@ class OcrEngine:
                     logging.warning(f"Failed to remove temporary file: {oe}")
             raise
 
-    def extract_text(self, img, lang='eng'):
+    def extract_text(self, img, lang='eng', psm=None, preprocess=True):
+        """preprocess=False 表示 img 已经过 self.preprocess()"""
+        with get_metrics().timer('ocr') as timing:
+            text = self._extract_text(img, lang, psm, preprocess)
+            timing.failed = text is None
+            return text
+
+    def extract_data(self, img, lang='eng', psm=None, preprocess=True, min_conf=None):
+        """逐词识别，返回 OcrData（坐标为 img 的坐标），识别出错时返回 None；
+        min_conf 不为 None 时去掉置信度更低的词
+        """
+        with get_metrics().timer('ocr_data') as timing:
+            self.ensure_language(lang)
+            key = self._cache_key(img, lang, psm, preprocess, mode=f"data|min_conf={min_conf}")
+            if key is not None:
+                data = self.cache.get(key)
+                if data is not None:
+                    return data
+            size = img.size
+            if preprocess:
+                img = self.preprocess(img)
+            tsv = self._recognize(img, lang, psm, method='image_to_data')
+            if tsv is None:
+                timing.failed = True
+                return None
+            # 预处理可能缩放了图像，坐标换算回原图
+            data = OcrData.from_tsv(tsv).scale(size[0] / img.size[0], size[1] / img.size[1])
+            if min_conf is not None:
+                data = data.filter(min_conf)
+            if key is not None:
+                self.cache.put(key, data)
+            return data
+
+    def preprocess(self, img):
+        """返回交给 OCR 后端的 PIL 图像"""
+        if self.preprocessor is not None:
+            with get_metrics().timer('ocr_preprocess'):
+                return self.preprocessor.process(img)
+        # ScreenCapture.Frame 只在这里才转换成 PIL 图像
+        if hasattr(img, 'to_image'):
+            return img.to_image()
+        return img
+
+    @staticmethod
+    def _timed_extract(extract, img, lang, *args):
+        start = time.perf_counter()
+        try:
+            text = extract(img, lang, *args)
+            return OcrResult(text, lang, time.perf_counter() - start, None)
+        except Exception as e:
+            return OcrResult(None, lang, time.perf_counter() - start, e)
+
+    def _run_parallel(self, jobs, extract=None):
+        """jobs 为 [(img, lang, psm[, preprocess]), ...]，按输入顺序返回 OcrResult
+
+        extract 默认为 self.extract_text，也可以是 self.extract_data 等签名相同的方法。
+        """
+        extract = extract or self.extract_text
+        if len(jobs) <= 1:
+            return [self._timed_extract(extract, *job) for job in jobs]
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ocr')
+        futures = [self._executor.submit(self._timed_extract, extract, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+    def extract_text_batch(self, images, lang='eng', psm=None):
+        """并行识别多张图片（例如多个选区或文字条带），按输入顺序返回 OcrResult 列表"""
+        if images:
+            self.ensure_language(lang)  # 在进入线程池之前下载，避免重复下载
+        return self._run_parallel([(img, lang, psm) for img in images])
+
+    def extract_data_batch(self, images, lang='eng', psm=None, min_conf=None):
+        """并行逐词识别多张图片，OcrResult.text 为 OcrData"""
+        if images:
+            self.ensure_language(lang)
+        return self._run_parallel([(img, lang, psm, True, min_conf) for img in images], extract=self.extract_data)
+
+    def extract_text_languages(self, img, langs, psm=None):
+        """用多种语言并行识别同一张图片，按 langs 的顺序返回 OcrResult 列表"""
+        for lang in langs:
+            self.ensure_language(lang)
+        # 预处理与语言无关，只做一次，各线程共用结果
+        img = self.preprocess(img)
+        return self._run_parallel([(img, lang, psm, False) for lang in langs])
+
+    def extract_data_languages(self, img, langs, psm=None):
+        """用多种语言并行逐词识别同一张图片，OcrResult.text 为 OcrData"""
+        for lang in langs:
+            self.ensure_language(lang)
+        img = self.preprocess(img)
+        return self._run_parallel([(img, lang, psm, False) for lang in langs], extract=self.extract_data)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.backend.close()
+
+    def ensure_language(self, lang):
+        """检查语言是否支持，缺少训练数据时下载；组合语言（如 'eng+jpn'）逐个检查"""
+        if '+' in lang:
+            for part in lang.split('+'):
+                self.ensure_language(part)
+            return
         if lang not in self.LANG_MAPPINGS:
             logging.error(f"❌ do not support language: '{lang}'")
             raise Exception(f"❌ do not support language: '{lang}'")
@@ -134,11 +265,51 @@ class OcrEngine:
             logging.warning(f"⚠️ not found the language file '{lang}'，try to download...")
             self._download_language(lang)
 
-        config = f'--tessdata-dir "{self.tessdata_dir}"'
+    def _cache_key(self, img, lang, psm, preprocess, mode='text'):
+        """OCR 结果缓存的键，未启用缓存时返回 None"""
+        if self.cache is None:
+            return None
+        # 哈希预处理之前的图像，并把预处理方案放进键里：命中时连预处理也省掉
+        preprocessing = self.preprocessor.config() if preprocess and self.preprocessor is not None else 'raw'
+        return OcrCache.make_key(img, lang, f"{mode}|psm={psm}|{preprocessing}")
+
+    def _extract_text(self, img, lang, psm, preprocess=True):
+        self.ensure_language(lang)
+        key = self._cache_key(img, lang, psm, preprocess)
+        if key is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                return text
+        if preprocess:
+            img = self.preprocess(img)
+        text = self._recognize(img, lang, psm)
+        if key is not None and text is not None:
+            self.cache.put(key, text)
+        return text
 
+    def _recognize(self, img, lang, psm, method='image_to_string'):
+        """method 为后端的 image_to_string 或 image_to_data；识别报错时返回 None"""
+        backend = self.backend
         try:
-            text = pytesseract.image_to_string(img, lang=lang)
-            return text
+            return getattr(backend, method)(img, lang, psm)
+        except BackendInitError as e:
+            # 常驻后端加载不了模型时换用 pytesseract，保证识别不中断
+            self._fall_back(backend, e)
+            return self._recognize(img, lang, psm, method)
         except pytesseract.TesseractError as e:
             logging.error(f"❌ OCR error: {e}")
-            return None
\ No newline at end of file
+            return None
+        except Exception as e:
+            if isinstance(backend, PytesseractBackend):
+                raise
+            # 单次识别出错（例如图像异常）不影响已加载的模型，继续使用常驻后端
+            logging.error(f"❌ {backend.name} OCR error: {e}")
+            return None
+
+    def _fall_back(self, backend, error):
+        with self._backend_lock:
+            if self.backend is not backend:  # 其他线程已经切换过
+                return
+            logging.warning(f"⚠️ {backend.name} unavailable ({error}), falling back to pytesseract")
+            self.backend = PytesseractBackend()
+        backend.close()
\ No newline at end of file
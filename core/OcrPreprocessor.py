@@ -0,0 +1,142 @@
+'''
+OCR 预处理：灰度、浅色文字反相、按字高缩放、自适应二值化，全部用 NumPy 向量化实现
+
+Tesseract 在字高约 20~40 像素时又快又准：游戏里的小字需要放大，大选区里的大字缩小后识别更快。
+'''
+import logging
+import os
+
+import numpy as np
+from PIL import Image
+
+# 预设的预处理组合，可通过环境变量 OCR_PREPROCESS 选择
+PROFILES = {
+    'raw': None,  # 不做预处理，直接把截图交给 Tesseract
+    'gray': dict(invert=False, rescale=False, binarize=None),
+    'scale': dict(invert='auto', rescale=True, binarize=None),
+    'otsu': dict(invert='auto', rescale=True, binarize='otsu'),
+    'adaptive': dict(invert='auto', rescale=True, binarize='adaptive'),
+}
+DEFAULT_PROFILE = 'scale'
+
+
+def to_gray(img):
+    """Frame / PIL 图像 / ndarray → (height, width) uint8 灰度图"""
+    if hasattr(img, 'gray'):
+        return img.gray()
+    if isinstance(img, Image.Image):
+        return np.asarray(img.convert('L'), dtype=np.uint8)
+    array = np.asarray(img)
+    if array.ndim == 2:
+        return array.astype(np.uint8, copy=False)
+    r = array[..., 0].astype(np.uint16)
+    g = array[..., 1].astype(np.uint16)
+    b = array[..., 2].astype(np.uint16)
+    return ((r * 77 + g * 150 + b * 29) >> 8).astype(np.uint8)
+
+
+def otsu_threshold(gray):
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    weight = np.cumsum(histogram)
+    mean = np.cumsum(histogram * np.arange(256))
+    # 类间方差，两端除零的位置记为 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (mean[-1] * weight - mean * total) ** 2 / (weight * (total - weight))
+    return int(np.nanargmax(np.nan_to_num(variance)))
+
+
+def local_mean(gray, block_size):
+    """block_size × block_size 窗口内的均值（积分图，O(1) 每像素）"""
+    pad = block_size // 2
+    padded = np.pad(gray, pad, mode='edge').astype(np.int64)
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=np.int64)
+    integral[1:, 1:] = padded.cumsum(axis=0).cumsum(axis=1)
+    h, w = gray.shape
+    b = 2 * pad + 1
+    window = (integral[b:b + h, b:b + w] - integral[:h, b:b + w]
+              - integral[b:b + h, :w] + integral[:h, :w])
+    return window / (b * b)
+
+
+class OcrPreprocessor:
+    def __init__(self, invert='auto', rescale=True, binarize=None, target_glyph_height=32,
+                 min_scale=0.3, max_scale=4.0, ink_tolerance=40, block_size=31, offset=10, max_pixels=4_000_000):
+        self.invert = invert  # 'auto'：背景偏暗（浅色文字）时反相为白底黑字
+        self.rescale = rescale
+        self.binarize = binarize  # None / 'otsu' / 'adaptive'
+        self.target_glyph_height = target_glyph_height  # 缩放后文字行的目标像素高度
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.max_pixels = max_pixels  # 放大后的像素数上限：大选区里的小字不放大到上千万像素
+        self.ink_tolerance = ink_tolerance
+        self.block_size = block_size  # 自适应二值化的窗口，约为一到两个字的大小
+        self.offset = offset  # 比局部均值暗 offset 以上才算文字，避免背景纹理变成噪点
+
+    @classmethod
+    def from_profile(cls, name):
+        """按 PROFILES 中的名字创建，'raw' 返回 None"""
+        options = PROFILES[name]
+        return cls(**options) if options is not None else None
+
+    def config(self):
+        """影响输出图像的全部参数，用作 OCR 结果缓存键的一部分"""
+        return ','.join(f"{name}={value}" for name, value in sorted(vars(self).items()))
+
+    def estimate_glyph_height(self, gray):
+        """按行投影找出连续的文字行，返回行高的中位数；找不到文字时返回 None"""
+        background = int(np.median(gray))
+        ink = np.abs(gray.astype(np.int16) - background) > self.ink_tolerance
+        # 一行中至少有少量文字像素才算文字行，过滤零星噪点
+        rows = ink.sum(axis=1) >= max(1, gray.shape[1] // 200)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.view(np.int8), [0]))))
+        heights = edges[1::2] - edges[::2]
+        heights = heights[heights >= 3]
+        if heights.size == 0:
+            return None
+        return float(np.median(heights))
+
+    def scale_for(self, gray):
+        glyph_height = self.estimate_glyph_height(gray)
+        if glyph_height is None:
+            return 1.0
+        scale = min(self.max_scale, max(self.min_scale, self.target_glyph_height / glyph_height))
+        pixels = gray.shape[0] * gray.shape[1]
+        if scale > 1 and pixels * scale * scale > self.max_pixels:
+            scale = max(1.0, (self.max_pixels / pixels) ** 0.5)
+        # 差别不大时不缩放，省掉一次重采样
+        return 1.0 if abs(scale - 1.0) < 0.15 else scale
+
+    def process(self, img):
+        """返回交给 Tesseract 的 PIL 灰度图像"""
+        gray = to_gray(img)
+        if self.invert == 'auto':
+            invert = np.median(gray) < 128
+        else:
+            invert = bool(self.invert)
+        if invert:
+            gray = 255 - gray
+
+        if self.rescale:
+            scale = self.scale_for(gray)
+            if scale != 1.0:
+                h, w = gray.shape
+                size = (max(1, round(w * scale)), max(1, round(h * scale)))
+                resample = Image.BICUBIC if scale > 1 else Image.BILINEAR
+                gray = np.asarray(Image.fromarray(gray).resize(size, resample), dtype=np.uint8)
+                logging.debug(f"OCR preprocess: rescaled {w}x{h} by {scale:.2f}")
+
+        if self.binarize == 'otsu':
+            gray = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+        elif self.binarize == 'adaptive':
+            gray = np.where(gray > local_mean(gray, self.block_size) - self.offset, 255, 0).astype(np.uint8)
+        return Image.fromarray(gray)
+
+
+def create_preprocessor(profile=None):
+    """profile 默认读取环境变量 OCR_PREPROCESS"""
+    profile = profile or os.getenv('OCR_PREPROCESS', DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        logging.warning(f"⚠️ unknown OCR_PREPROCESS profile '{profile}', using '{DEFAULT_PROFILE}'")
+        profile = DEFAULT_PROFILE
+    return OcrPreprocessor.from_profile(profile)
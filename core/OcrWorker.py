@@ -0,0 +1,234 @@
+'''
+OCR/翻译工作进程：界面进程只负责截图和显示，识别和翻译在独立进程中执行，不再与界面争抢 GIL
+
+帧数据通过 SharedFrameRing 共享内存传递，Pipe 上只传递很小的控制消息：
+    界面 → 工作进程: ('ring', name, slots, slot_size) / ('frame', slot, seq, context) / ('reset',) / ('stop',)
+    工作进程 → 界面: ('ring_attached', name) / ('result', text, translation, submitted_at) / ('failure',)
+                     / ('metrics', snapshot, collected)
+
+工作进程的耗时统计和各组件计数转发到界面进程的 Metrics，由界面进程统一导出；
+工作进程意外退出时自动重启。
+'''
+import logging
+import multiprocessing
+import threading
+import time
+
+from SharedFrameRing import SharedFrameRing
+
+
+def worker_main(conn, translation_timeout):
+    """工作进程入口：收到的帧交给 OCR → 翻译 流水线，结果发回界面进程"""
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - [ocr-worker] %(message)s')
+    # 重量级依赖只在工作进程中导入
+    from FrameTranslator import FrameTranslator
+    from Metrics import get_metrics
+    from Pipeline import Pipeline
+
+    send_lock = threading.Lock()
+    last_metrics = [0.0]
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def on_result(result):
+        send(('result',) + tuple(result))
+        # 工作进程中的耗时统计定期发回界面显示
+        now = time.monotonic()
+        if now - last_metrics[0] >= 2.0:
+            last_metrics[0] = now
+            send(('metrics', metrics.snapshot(), metrics.collect()))
+
+    metrics = get_metrics()
+    frame_translator = FrameTranslator(translation_timeout, on_failure=lambda: send(('failure',)))
+    frame_translator.register_metrics(metrics)
+    pipeline = Pipeline(frame_translator.stages(), on_result, name='ocr-worker')
+    pipeline.start()
+    ring = None
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break  # 界面进程已退出
+            kind = message[0]
+            if kind == 'frame':
+                _, slot, seq, context = message
+                frame = ring.read(slot, seq) if ring is not None else None
+                if frame is not None:
+                    pipeline.submit(frame, context)
+            elif kind == 'ring':
+                if ring is not None:
+                    ring.close()
+                ring = SharedFrameRing(message[2], message[3], name=message[1])
+                send(('ring_attached', ring.name))
+            elif kind == 'reset':
+                frame_translator.reset()
+            elif kind == 'stop':
+                break
+    finally:
+        pipeline.stop()
+        if ring is not None:
+            ring.close()
+
+
+class OcrWorkerClient:
+    """界面进程一侧：把截图写入共享内存并通知工作进程，在后台线程接收结果"""
+
+    def __init__(self, on_result, on_failure=None, translation_timeout=8.0, slots=4, metrics=None, max_restarts=5):
+        self.on_result = on_result  # on_result(text, translation, submitted_at)，在接收线程中调用
+        self.on_failure = on_failure
+        self.translation_timeout = translation_timeout
+        self.slots = slots
+        self.metrics = metrics  # 设置后工作进程的统计转发到该 MetricsRegistry
+        self.max_restarts = max_restarts  # 连续重启次数上限，避免启动即崩溃时无限重启
+        self.frames_sent = 0
+        self.restarts = 0
+        self.worker_metrics = {}
+        self.worker_collectors = {}  # name -> (values, label)
+        self._stopping = False
+        self._ring = None
+        self._retired_rings = []  # 已被替换、但工作进程可能还没切换过去的共享内存
+        self._conn = None
+        self._process = None
+        self._send_lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        if self.alive:
+            return
+        self._stopping = False
+        if self.metrics is not None:
+            self.metrics.register_remote('ocr-worker', lambda: self.worker_metrics)
+        self._spawn()
+
+    def _spawn(self):
+        # spawn：不继承界面进程的 Qt 状态和线程，各平台行为一致
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(target=worker_main, args=(child_conn, self.translation_timeout),
+                                        name='ocr-worker', daemon=True)
+        self._process.start()
+        child_conn.close()
+        threading.Thread(target=self._receive_loop, args=(self._conn, self._process),
+                         name='ocr-worker-results', daemon=True).start()
+        logging.info(f"🧵 started OCR worker process {self._process.pid}")
+
+    def _send(self, message):
+        with self._send_lock:
+            if self._conn is not None:
+                self._conn.send(message)
+
+    def submit(self, frame, context):
+        """在截图线程中调用；只传递槽位号，帧数据不经过 pickle"""
+        nbytes = len(frame.raw)
+        with self._send_lock:
+            if self._conn is None:
+                return  # 工作进程已停止或正在重启
+
+            if self._ring is None or nbytes > self._ring.slot_size:
+                # 选区变大时换一块更大的共享内存；旧的在工作进程确认切换之后再释放
+                if self._ring is not None:
+                    self._retired_rings.append(self._ring)
+                self._ring = SharedFrameRing(self.slots, nbytes)
+                self._conn.send(('ring', self._ring.name, self.slots, nbytes))
+            slot, seq = self._ring.write(frame)
+            self._conn.send(('frame', slot, seq, context))
+            self.frames_sent += 1
+
+    def reset(self):
+        if self.alive:
+            self._send(('reset',))
+
+    def _receive_loop(self, conn, process):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == 'result':
+                self.on_result(*message[1:])
+            elif kind == 'ring_attached':
+                self._release_rings(message[1])
+            elif kind == 'failure':
+                if self.on_failure is not None:
+                    self.on_failure()
+            elif kind == 'metrics':
+                self.worker_metrics = message[1]
+                self._update_collectors(message[2])
+                self.restarts = 0  # 工作进程已经正常产出结果
+        process.join(timeout=3)
+        if self._stopping or process is not self._process:
+            return
+        logging.error(f"❌ OCR worker process exited with code {process.exitcode}")
+        self._restart()
+
+    def _update_collectors(self, collected):
+        new_names = [name for name in collected if name not in self.worker_collectors]
+        self.worker_collectors = collected
+        if self.metrics is None:
+            return
+        for name in new_names:
+            self.metrics.register_collector(
+                name, lambda name=name: self.worker_collectors.get(name, ({},))[0], label=collected[name][1])
+
+    def _restart(self):
+        """工作进程意外退出：释放共享内存，重新启动；下一帧会重新创建共享内存"""
+        with self._send_lock:
+            if self._stopping:
+                return
+            self._conn.close()
+            self._conn = None
+            rings = self._retired_rings + ([self._ring] if self._ring is not None else [])
+            self._retired_rings, self._ring = [], None
+        for ring in rings:
+            ring.close()
+            ring.unlink()
+        if self.restarts >= self.max_restarts:
+            logging.error(f"❌ OCR worker crashed {self.restarts} times in a row, giving up")
+            return
+        self.restarts += 1
+        time.sleep(min(30, 2 ** (self.restarts - 1)))  # 连续崩溃时逐步拉长重启间隔
+        with self._send_lock:
+            if self._stopping:
+                return
+            logging.info(f"🔁 restarting OCR worker (attempt {self.restarts})")
+            self._spawn()
+
+    def _release_rings(self, attached_name):
+        """工作进程已经切换到 attached_name，比它更早的共享内存都可以释放"""
+        with self._send_lock:
+            names = [ring.name for ring in self._retired_rings]
+            count = names.index(attached_name) if attached_name in names else len(self._retired_rings)
+            released, self._retired_rings = self._retired_rings[:count], self._retired_rings[count:]
+        for ring in released:
+            ring.close()
+            ring.unlink()
+
+    def stop(self):
+        with self._send_lock:
+            self._stopping = True
+            process, conn = self._process, self._conn
+            self._process = self._conn = None
+        if process is None:
+            return
+        if conn is not None:
+            try:
+                conn.send(('stop',))
+            except OSError:
+                pass
+        process.join(timeout=3)
+        if process.is_alive():
+            process.terminate()
+        if conn is not None:
+            conn.close()
+        for ring in self._retired_rings + ([self._ring] if self._ring is not None else []):
+            ring.close()
+            ring.unlink()
+        self._retired_rings = []
+        self._ring = None
@@ -0,0 +1,180 @@
+'''
+多阶段处理流水线：截图 → OCR → 翻译，各阶段之间用有界队列连接，只处理最新的一帧
+'''
+import logging
+import threading
+from collections import deque
+
+
+class Job:
+    """流水线中的一个任务，seq 越大越新；context 保存提交时的参数（语言等）"""
+
+    def __init__(self, seq, value, context=None):
+        self.seq = seq
+        self.value = value
+        self.context = context or {}
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+
+class LatestQueue:
+    """有界队列：满了之后丢弃最旧的任务（latest-frame-wins）"""
+
+    def __init__(self, maxsize=1):
+        self._items = deque()
+        self.maxsize = maxsize
+        self._cond = threading.Condition()
+
+    def put(self, job):
+        """放入任务，返回因此被丢弃的旧任务列表"""
+        dropped = []
+        with self._cond:
+            while len(self._items) >= self.maxsize:
+                dropped.append(self._items.popleft())
+            self._items.append(job)
+            self._cond.notify()
+        return dropped
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class Stage:
+    """一个处理阶段：fn(job) 返回交给下一阶段的值，返回 None 表示到此为止
+
+    cancel_superseded 为 True 时，新任务进入该阶段会取消本阶段正在处理的旧任务；
+    fn 可以通过 job.cancelled 提前结束，阶段结束后被取消的结果不会继续传递。
+    """
+
+    def __init__(self, name, fn, maxsize=1, cancel_superseded=True):
+        self.name = name
+        self.fn = fn
+        self.queue = LatestQueue(maxsize)
+        self.cancel_superseded = cancel_superseded
+        self.current = None
+        self.processed = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.errors = 0
+
+
+class Pipeline:
+    def __init__(self, stages, on_result, name='pipeline'):
+        self.stages = stages
+        self.on_result = on_result
+        self.name = name
+        self._seq = 0
+        self._last_delivered = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._threads = []
+        for index, stage in enumerate(self.stages):
+            thread = threading.Thread(target=self._run_stage, args=(index,), name=f"{self.name}-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(f"🚀 {self.name} started with stages: {[stage.name for stage in self.stages]}")
+
+    def stop(self):
+        self._running = False
+        for stage in self.stages:
+            if stage.current is not None:
+                stage.current.cancel()
+            stage.queue.wake()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+
+    def submit(self, value, context=None):
+        """提交新任务到第一个阶段"""
+        with self._lock:
+            self._seq += 1
+            job = Job(self._seq, value, context)
+        self._enqueue(0, job)
+        return job
+
+    def _enqueue(self, index, job):
+        stage = self.stages[index]
+        dropped = stage.queue.put(job)
+        with self._lock:
+            stage.dropped += len(dropped)
+            current = stage.current
+            if stage.cancel_superseded and current is not None and current.seq < job.seq and not current.cancelled:
+                current.cancel()
+                logging.debug(f"{self.name}: cancelled stale job {current.seq} in stage '{stage.name}'")
+
+    def _run_stage(self, index):
+        stage = self.stages[index]
+        while self._running:
+            job = stage.queue.get(timeout=0.5)
+            if job is None:
+                continue
+            with self._lock:
+                stage.current = job
+            try:
+                result = stage.fn(job)
+            except Exception as e:
+                logging.error(f"{self.name}: stage '{stage.name}' error: {e}")
+                with self._lock:
+                    stage.errors += 1
+                    stage.current = None
+                continue
+
+            with self._lock:
+                stage.current = None
+                stage.processed += 1
+                if job.cancelled:
+                    stage.cancelled += 1
+                    continue
+            if result is None:
+                continue
+
+            job.value = result
+            if index + 1 < len(self.stages):
+                self._enqueue(index + 1, job)
+            else:
+                self._deliver(job)
+
+    def _deliver(self, job):
+        with self._lock:
+            # 更旧的任务如果晚到，直接丢弃，保证界面不会回退到旧结果
+            if job.seq < self._last_delivered:
+                self.stages[-1].dropped += 1
+                return
+            self._last_delivered = job.seq
+        self.on_result(job.value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                stage.name: {
+                    'depth': len(stage.queue),
+                    'processed': stage.processed,
+                    'dropped': stage.dropped,
+                    'cancelled': stage.cancelled,
+                    'errors': stage.errors,
+                }
+                for stage in self.stages
+            }
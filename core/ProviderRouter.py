@@ -0,0 +1,190 @@
+'''
+翻译服务路由：根据各服务最近的延迟和错误率选择最快的可用服务，支持对冲请求和熔断
+'''
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from TranslationErrors import TranslationCancelled, TranslationError, TranslationTimeout, check_cancelled
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后打开，之后每 reset_timeout 秒放行一个探测请求"""
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def available(self):
+        """是否可以向该服务发请求（只查询状态，不占用探测名额），用于排序"""
+        return self.state == self.CLOSED or time.time() - self.opened_at >= self.reset_timeout
+
+    def allow(self):
+        """真正发请求之前调用：熔断打开时在这里领取探测名额"""
+        if self.state == self.CLOSED:
+            return True
+        if self.available():
+            self.state = self.HALF_OPEN
+            self.opened_at = time.time()  # 下一个探测请求至少再等 reset_timeout
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logging.info("✅ circuit closed after successful probe")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == self.CLOSED:
+                logging.warning(f"⚠️ circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.time()
+
+
+class ProviderHealth:
+    """滚动窗口内的延迟和成功率"""
+
+    def __init__(self, window=50, default_latency=1.0):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.default_latency = default_latency  # 还没有样本时假定的延迟
+        self.breaker = CircuitBreaker()
+
+    def record(self, elapsed, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(elapsed)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def percentile(self, q):
+        if not self.latencies:
+            return self.default_latency
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def score(self):
+        """越小越好：中位延迟按错误率加权"""
+        return self.percentile(0.5) * (1.0 + 4.0 * self.error_rate())
+
+
+class ProviderRouter:
+    def __init__(self, providers, hedge=True, min_hedge_delay=0.2, max_workers=4):
+        self.providers = list(providers)  # 顺序即没有统计数据时的优先级
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.health = {name: ProviderHealth() for name in self.providers}
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translate-router')
+
+    def ranked(self):
+        """按得分排序的可用服务；全部熔断时按原顺序全部返回，总比不翻译好"""
+        with self._lock:
+            healthy = [name for name in self.providers if self.health[name].breaker.available()]
+            if not healthy:
+                return list(self.providers)
+            return sorted(healthy, key=lambda name: (self.health[name].score(), self.providers.index(name)))
+
+    def _submit_next(self, fn, order, pending):
+        """从 order 中取出下一个能领取到请求名额的服务并提交，返回服务名；没有可用服务时返回 None"""
+        while order:
+            provider = order.pop(0)
+            with self._lock:
+                # 全部熔断时 ranked() 返回所有服务，此时照常请求
+                allowed = self.health[provider].breaker.allow() or not any(
+                    self.health[name].breaker.available() for name in self.providers)
+            if allowed:
+                pending[self._executor.submit(self._timed, fn, provider)] = provider
+                return provider
+        return None
+
+    def _timed(self, fn, provider):
+        start = time.time()
+        try:
+            result = fn(provider)
+        except TranslationCancelled:
+            raise  # 取消不代表服务不健康
+        except Exception:
+            with self._lock:
+                self.health[provider].record(time.time() - start, False)
+            raise
+        with self._lock:
+            self.health[provider].record(time.time() - start, True)
+        return result
+
+    def _wait(self, pending, timeout, deadline, cancel_token):
+        """等待任意一个请求完成，期间检查截止时间和取消"""
+        end = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            check_cancelled(cancel_token)
+            if deadline is not None and deadline.expired:
+                raise TranslationTimeout("translation deadline exceeded")
+            step = 0.1
+            if end is not None:
+                step = min(step, max(0.0, end - time.monotonic()))
+            done, _ = wait(pending, timeout=step, return_when=FIRST_COMPLETED)
+            if done or (end is not None and time.monotonic() >= end):
+                return done
+
+    def call(self, fn, deadline=None, cancel_token=None):
+        """fn(provider) 执行一次请求，失败时抛出异常；返回最先成功的结果"""
+        remaining = self.ranked()
+        pending = {}
+        primary = self._submit_next(fn, remaining, pending)
+        if primary is None:
+            raise TranslationError("no translation provider available")
+        last_error = None
+
+        if self.hedge and remaining:
+            # 主服务超过其 p95 延迟仍未返回时，向下一个服务发出对冲请求
+            with self._lock:
+                delay = max(self.min_hedge_delay, self.health[primary].percentile(0.95))
+            done = self._wait(pending, delay, deadline, cancel_token)
+            if not done:
+                provider = self._submit_next(fn, remaining, pending)
+                if provider is not None:
+                    logging.info(f"⏱️ {primary} slower than {delay:.2f}s, hedging to {provider}")
+                    with self._lock:
+                        self.hedged_requests += 1
+
+        while pending:
+            done = self._wait(pending, None, deadline, cancel_token)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logging.warning(f"⚠️ provider {provider} failed: {e}")
+            # 所有在途请求都失败了，再按顺序尝试下一个服务
+            if not pending and remaining:
+                self._submit_next(fn, remaining, pending)
+        raise last_error
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    'p50': health.percentile(0.5),
+                    'p95': health.percentile(0.95),
+                    'error_rate': health.error_rate(),
+                    'state': health.breaker.state,
+                }
+                for name, health in self.health.items()
+            }
@@ -0,0 +1,47 @@
+'''
+翻译服务限流：并发数上限 + 按请求数和字符数的令牌桶
+'''
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenBucket:
+    """容量为 capacity、每秒补充 rate 个令牌的令牌桶，令牌不足时阻塞等待"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        # 超过容量的请求（例如一段很长的文本）在桶满时放行，避免永远等不到
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ProviderLimiter:
+    """单个翻译服务的限制：同时在途的请求数、每秒请求数、每秒字符数"""
+
+    def __init__(self, max_concurrency=4, requests_per_second=5, chars_per_second=5000):
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.requests = TokenBucket(requests_per_second)
+        self.chars = TokenBucket(chars_per_second)
+
+    @contextmanager
+    def limit(self, chars):
+        with self._semaphore:
+            self.requests.acquire(1)
+            self.chars.acquire(chars)
+            yield
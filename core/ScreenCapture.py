@@ -2,44 +2,108 @@
 管理多屏截图逻辑
 '''
 import logging
+import threading
+import time
 
 # ScreenCapture.py
 # 区域截图模块
 
 import mss
+import numpy as np
 from PIL import Image
 
+from Metrics import get_metrics
+
+
+class Frame:
+    """一帧截图：直接持有 mss 返回的 BGRA 缓冲区，不做额外拷贝
+
+    ``bgra`` 是对原始缓冲区的 (height, width, 4) 视图；灰度图和 PIL 图像
+    只在第一次被用到时才生成。
+    """
+
+    def __init__(self, raw, width, height, timestamp=None):
+        self.raw = raw
+        self.width = width
+        self.height = height
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.bgra = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+        self._gray = None
+        self._image = None
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def gray(self):
+        """整数近似的 BT.601 灰度图 (height, width) uint8"""
+        if self._gray is None:
+            b = self.bgra[..., 0].astype(np.uint16)
+            g = self.bgra[..., 1].astype(np.uint16)
+            r = self.bgra[..., 2].astype(np.uint16)
+            self._gray = ((r * 77 + g * 150 + b * 29) >> 8).astype(np.uint8)
+        return self._gray
+
+    def to_image(self):
+        """按需生成 PIL RGB 图像（BGRX 解码在 C 中完成，只拷贝一次）"""
+        if self._image is None:
+            self._image = Image.frombuffer('RGB', self.size, self.raw, 'raw', 'BGRX', 0, 1)
+        return self._image
+
+
 class ScreenCapture:
-    def __init__(self):
-        self.sct = None
+    def __init__(self, recorder=None):
+        # mss 句柄不能跨线程使用，所以每个线程维护一个长期存在的会话
+        self._local = threading.local()
+        # 可选的 FrameRecorder，保存每一帧用于离线回放
+        self.recorder = recorder
 
-    def _ensure_mss_instance(self):
-        if self.sct is None:
-            self.sct = mss.mss()
+    def _session(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            logging.info(f"Opened capture session for thread {threading.current_thread().name}")
+        return sct
+
+    def close(self):
+        """关闭当前线程的截图会话"""
+        sct = getattr(self._local, 'sct', None)
+        self._local.sct = None
+        if sct is not None:
+            try:
+                sct.close()
+            except Exception as e:
+                logging.warning(f"Failed to close capture session: {e}")
 
     def capture_area(self, rect):
+        with get_metrics().timer('capture') as timing:
+            frame = self._capture_area(rect)
+            timing.failed = frame is None
+        if frame is not None and self.recorder is not None:
+            self.recorder.record(frame, rect)
+        return frame
+
+    def _capture_area(self, rect):
         # rect 是 QRect对象，需要转换为 dict
         logging.info("Start capturing area")
         try:
-            self._ensure_mss_instance()
             monitor = {
                 "top": rect.top(),
                 "left": rect.left(),
                 "width": rect.width(),
                 "height": rect.height()
             }
-            with self.sct as sct:
-                sct_img = sct.grab(monitor)
-                img = Image.frombytes('RGB', (sct_img.width, sct_img.height), sct_img.rgb)
-                return img
+            sct_img = self._session().grab(monitor)
+            return Frame(sct_img.raw, sct_img.width, sct_img.height)
         except mss.exception.ScreenShotError as e:
             logging.error(f"Screenshot error: {e}")
-            self.sct = None  # Reset the instance
+            self.close()  # Reset the session
             return None
         except ValueError as e:
             logging.error(f"Image conversion error: {e}")
             return None
         except Exception as e:
             logging.error(f"Unexpected error during screen capture: {e}")
-            self.sct = None  # Reset the instance
+            self.close()  # Reset the session
             return None
@@ -0,0 +1,89 @@
+'''
+按句/行增量翻译：只翻译缓存中没有的片段，再按原顺序拼接
+'''
+import logging
+import re
+import threading
+
+from TranslationErrors import check_cancelled
+
+# 句末标点后的空白作为分句点；中日文句号后通常没有空白
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+
+
+def split_segments(text):
+    """把文本拆成 [(片段, 片段后的分隔符), ...]，拼接回去与原文一致"""
+    segments = []
+    for line_match in re.finditer(r'([^\n]*)(\n|$)', text):
+        line, newline = line_match.group(1), line_match.group(2)
+        if not line and not newline:
+            break
+        start = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(line):
+            if boundary.end() > start:
+                segments.append((line[start:boundary.start()], boundary.group(0)))
+                start = boundary.end()
+        segments.append((line[start:], newline))
+    return segments
+
+
+class SegmentTranslator:
+    def __init__(self, translate_batch_fn, cache, fuzzy=False):
+        self.translate_batch_fn = translate_batch_fn  # translate_batch_fn(texts, src, dest, cancel_token) -> [str]
+        self.cache = cache
+        self.fuzzy = fuzzy  # 精确查找未命中时是否使用近似匹配（只适合实时 OCR 这类有误识别的输入）
+        self.segments_total = 0
+        self.segments_translated = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, src, dest, cancel_token=None):
+        """翻译整段文字；翻译失败或被取消时抛出 TranslationError 的子类"""
+        return self.translate_many([text], src, dest, cancel_token)[0]
+
+    def translate_many(self, texts, src, dest, cancel_token=None):
+        """翻译多段文字，所有文字中重复的片段只翻译一次，返回与 texts 一一对应的译文"""
+        split = [split_segments(text) for text in texts]
+        translations = {}
+        missing = []
+        for segments in split:
+            for segment, _ in segments:
+                source = segment.strip()
+                if not source or source in translations or source in missing:
+                    continue
+                # OCR 误识别了个别字符时，近似匹配已有的译文
+                cached = self.cache.get(source, src, dest, fuzzy=self.fuzzy)
+                if cached is not None:
+                    translations[source] = cached
+                else:
+                    missing.append(source)
+
+        # 缺失的片段一次性批量翻译
+        if missing:
+            check_cancelled(cancel_token)
+            for source, result in zip(missing, self.translate_batch_fn(missing, src, dest, cancel_token)):
+                self.cache.put(source, src, dest, result)
+                translations[source] = result
+        translated = len(missing)
+
+        total = sum(1 for segments in split for segment, _ in segments if segment.strip())
+        with self._lock:
+            self.segments_total += total
+            self.segments_translated += translated
+        logging.debug(f"Segment translation: {translated}/{total} segment(s) sent to provider")
+
+        results = []
+        for segments in split:
+            parts = []
+            for segment, separator in segments:
+                source = segment.strip()
+                parts.append(translations[source] if source else segment)
+                parts.append(separator)
+            results.append(''.join(parts))
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'segments_total': self.segments_total,
+                'segments_translated': self.segments_translated,
+            }
@@ -0,0 +1,66 @@
+'''
+跨进程传递截图帧的共享内存环形缓冲区：帧数据直接写入共享内存，进程间只传递槽位号和序号
+
+每个槽位的布局：
+    begin(Q) width(I) height(I) nbytes(Q) timestamp(d) end(Q) | BGRA 数据
+写入方先写 begin，再写数据和尺寸，最后写 end（顺序锁）。读取方先读 end、拷贝数据、再读 begin，
+两者都等于期望的序号才说明拷贝期间没有被新的帧覆盖；被覆盖的帧反正已经过时，直接丢弃。
+'''
+import struct
+from multiprocessing import shared_memory
+
+from ScreenCapture import Frame
+
+SEQ = struct.Struct('<Q')
+META = struct.Struct('<IIQd')
+HEADER_SIZE = SEQ.size * 2 + META.size
+
+
+class SharedFrameRing:
+    def __init__(self, slots, slot_size, name=None):
+        """name 为 None 时创建新的共享内存，否则连接到已有的共享内存"""
+        self.slots = slots
+        self.slot_size = slot_size  # 单帧数据的最大字节数
+        self._stride = HEADER_SIZE + slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self._stride * slots)
+            self.shm.buf[:self._stride * slots] = bytes(self._stride * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._seq = 0
+
+    def write(self, frame):
+        """写入一帧，返回 (槽位, 序号)；帧超过槽位大小时抛出 ValueError"""
+        nbytes = len(frame.raw)
+        if nbytes > self.slot_size:
+            raise ValueError(f"frame of {nbytes} bytes does not fit a {self.slot_size} byte slot")
+        self._seq += 1
+        slot = self._seq % self.slots
+        offset = slot * self._stride
+        buf = self.shm.buf
+        SEQ.pack_into(buf, offset, self._seq)
+        META.pack_into(buf, offset + SEQ.size, frame.width, frame.height, nbytes, frame.timestamp)
+        data = offset + HEADER_SIZE
+        buf[data:data + nbytes] = memoryview(frame.raw).cast('B')
+        SEQ.pack_into(buf, offset + SEQ.size + META.size, self._seq)
+        return slot, self._seq
+
+    def read(self, slot, seq):
+        """拷贝出一帧；该槽位已被更新的帧覆盖时返回 None"""
+        offset = slot * self._stride
+        buf = self.shm.buf
+        if SEQ.unpack_from(buf, offset + SEQ.size + META.size)[0] != seq:
+            return None
+        width, height, nbytes, timestamp = META.unpack_from(buf, offset + SEQ.size)
+        data = offset + HEADER_SIZE
+        raw = bytes(buf[data:data + nbytes])
+        if SEQ.unpack_from(buf, offset)[0] != seq:
+            return None
+        return Frame(raw, width, height, timestamp)
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
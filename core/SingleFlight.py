@@ -0,0 +1,49 @@
+'''
+相同请求合并：同一个 key 同时只有一个请求在执行，其余调用者等待并共享它的结果
+'''
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # 被合并掉的重复请求数
+
+    def claim(self, key):
+        """返回 (future, is_leader)；is_leader 为 True 时调用者负责执行并调用 resolve/fail"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def resolve(self, key, result):
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+
+    def fail(self, key, error):
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def do(self, key, fn):
+        """执行 fn()，相同 key 的并发调用只执行一次"""
+        future, leader = self.claim(key)
+        if leader:
+            try:
+                self.resolve(key, fn())
+            except BaseException as e:
+                self.fail(key, e)
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._inflight), 'coalesced': self.coalesced}
@@ -0,0 +1,91 @@
+'''
+文字区域检测：在缩小的灰度图上按边缘密度找出可能有文字的矩形，OCR 只识别这些区域
+
+选区里常有大片空白、头像、进度条等图形，整块交给 Tesseract 既慢又容易识别出乱码。
+文字的特点是短距离内亮度变化密集，先求边缘，再用水平/垂直投影（XY-cut）切出文字行。
+'''
+import numpy as np
+
+
+def _runs(mask, min_gap):
+    """mask 中为 True 的连续区间 [(start, end), ...]，间隔不超过 min_gap 的区间合并"""
+    idx = np.flatnonzero(mask)
+    if idx.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(idx) > min_gap)
+    starts = np.concatenate(([idx[0]], idx[breaks + 1]))
+    ends = np.concatenate((idx[breaks], [idx[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+class TextRegionDetector:
+    def __init__(self, max_side=640, edge_threshold=48, min_density=0.06, line_gap=4, word_gap=24,
+                 min_height=6, min_width=8, padding=4, min_transitions=4, transition_ratio=0.5):
+        self.max_side = max_side  # 下采样后最长边
+        self.edge_threshold = edge_threshold  # 相邻像素亮度差超过该值视为边缘
+        self.min_density = min_density  # 区域内边缘像素比例低于该值的视为图形或噪点
+        self.line_gap = line_gap  # 以下尺寸均为原图像素：小于该高度的空白不切分文字行
+        self.word_gap = word_gap  # 同一行内小于该宽度的空白视为同一区域（词间距）
+        self.min_height = min_height
+        self.min_width = min_width
+        self.padding = padding  # 裁剪时在文字周围保留的边距，Tesseract 需要一点背景
+        # 文字行内每一行像素都要穿过很多笔画；进度条、按钮等实心图形只在两端有水平方向的边缘。
+        # 区域内水平方向亮度跳变最多的一行至少要有 max(min_transitions, transition_ratio × 宽 / 高) 次跳变
+        self.min_transitions = min_transitions
+        self.transition_ratio = transition_ratio
+
+    def _downsample(self, gray):
+        height, width = gray.shape
+        step = max(1, -(-max(height, width) // self.max_side))
+        if step == 1:
+            return gray, 1
+        h, w = height // step, width // step
+        blocks = gray[:h * step, :w * step].reshape(h, step, w, step)
+        return blocks.mean(axis=(1, 3)).astype(np.uint8), step
+
+    def edges(self, gray):
+        """返回 (边缘, 水平方向的亮度跳变)，均为与 gray 同尺寸的布尔数组"""
+        small = gray.astype(np.int16)
+        horizontal = np.zeros(small.shape, dtype=bool)
+        horizontal[:, 1:] = np.abs(np.diff(small, axis=1)) > self.edge_threshold
+        vertical = np.zeros(small.shape, dtype=bool)
+        vertical[1:, :] = np.abs(np.diff(small, axis=0)) > self.edge_threshold
+        return horizontal | vertical, horizontal
+
+    def _looks_like_text(self, region, transitions):
+        height, width = region.shape
+        if region.mean() < self.min_density:
+            return False
+        required = max(self.min_transitions, self.transition_ratio * width / height)
+        return transitions.sum(axis=1).max() >= required
+
+    def detect(self, gray):
+        """返回原图坐标的文字区域 [(top, bottom, left, right), ...]
+
+        按阅读顺序排列：从上到下的每个条带中从左到右，同一列里的多行连续排列。
+        """
+        small, step = self._downsample(gray)
+        edges, horizontal = self.edges(small)
+        line_gap = max(1, self.line_gap // step)
+        word_gap = max(1, self.word_gap // step)
+
+        boxes = []
+        # 第一次切分：按行投影切出水平条带；第二次：条带内按列投影切出区域；第三次：收紧区域的上下边界
+        for top, bottom in _runs(edges.any(axis=1), line_gap):
+            band = edges[top:bottom]
+            for left, right in _runs(band.any(axis=0), word_gap):
+                block = band[:, left:right]
+                for t, b in _runs(block.any(axis=1), line_gap):
+                    if not self._looks_like_text(block[t:b], horizontal[top + t:top + b, left:right]):
+                        continue
+                    boxes.append((top + t, top + b, left, right))
+
+        height, width = gray.shape
+        regions = []
+        for top, bottom, left, right in boxes:
+            top, bottom, left, right = top * step, bottom * step, left * step, right * step
+            if bottom - top < self.min_height or right - left < self.min_width:
+                continue
+            regions.append((max(0, top - self.padding), min(height, bottom + self.padding),
+                            max(0, left - self.padding), min(width, right + self.padding)))
+        return regions
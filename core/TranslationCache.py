@@ -0,0 +1,319 @@
+'''
+翻译缓存：内存 LRU（按字节限制大小）+ SQLite 持久化，所有窗口共用一个实例
+'''
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, Counter
+
+from Metrics import get_metrics
+
+
+def default_cache_path():
+    """与 tessdata 相同的用户数据目录"""
+    if sys.platform == 'win32':
+        base_dir = os.path.join(os.getenv('APPDATA'), 'ScreenTranslator')
+    elif sys.platform == 'darwin':
+        base_dir = os.path.expanduser('~/Library/Application Support/ScreenTranslator')
+    else:  # Linux and others
+        base_dir = os.path.expanduser('~/.config/ScreenTranslator')
+    os.makedirs(base_dir, exist_ok=True)
+    return os.path.join(base_dir, 'translation_cache.sqlite3')
+
+
+def normalize_text(text):
+    """统一全半角、合并空白，避免同一段文字因为排版差异产生不同的键"""
+    text = unicodedata.normalize('NFKC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+# OCR 常见的形近字符，统一后再比较
+OCR_CONFUSABLES = str.maketrans({'i': 'l', '|': 'l', '!': 'l'})
+# 夹在字母中间或位于词首的这几个数字是误识别的字母（He1lo、0pen）；单独的数字和词尾的编号（Player2）仍是数字
+OCR_DIGIT_CONFUSABLES = {'1': 'l', '0': 'o', '5': 's'}
+LETTER_DIGIT = re.compile(r'(?<=[a-z])[015](?=[a-z])|(?<![a-z0-9])[015](?=[a-z])')
+
+# 否定词：多一个或少一个意思就相反，必须完全一致
+NEGATION_WORDS = frozenset(['no', 'not', 'never', 'none', 'nothing', 'cannot', 'without', 'nor', 'neither'])
+NEGATION_CHARS = '不没沒未無无非别別勿'
+
+
+def _casefold(text):
+    """小写，并把单词中误识别成数字的字母换回字母"""
+    text = normalize_text(text).casefold()
+    return LETTER_DIGIT.sub(lambda m: OCR_DIGIT_CONFUSABLES[m.group()], text)
+
+
+def fuzzy_normalize(text):
+    """小写、统一形近字符并去掉空白和标点，只保留用于相似度比较的字符"""
+    text = _casefold(text).translate(OCR_CONFUSABLES)
+    return ''.join(ch for ch in text if ch.isalnum())
+
+
+def fuzzy_guard(text):
+    """模糊匹配的两段文字必须完全相同的部分：数字（不含单词中的形近数字）、否定词"""
+    text = _casefold(text)
+    words = re.findall(r"[a-z']+", text)
+    negations = sorted(word for word in words if word in NEGATION_WORDS or word.endswith("n't"))
+    return (tuple(re.findall(r'\d+', text)), tuple(negations),
+            tuple(text.count(ch) for ch in NEGATION_CHARS), text.count('ない'))
+
+
+def within_ocr_edits(a, b, max_edits=2):
+    """a、b 的编辑距离不超过 max_edits，且最多只差一个多出或漏掉的字符（OCR 误识别通常是替换）"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+class FuzzyIndex:
+    """字符 n-gram 倒排索引，按 Dice 系数查找与 OCR 文本近似的已缓存原文
+
+    查询只遍历最稀有的几个 n-gram 的倒排列表（prefix filtering），
+    并最多验证 max_candidates 个候选，保证单次查找的耗时有上限。
+    候选还必须数字和否定词完全相同、只差 max_edits 个以内的字符，避免返回另一句话的译文。
+    """
+
+    def __init__(self, threshold=0.85, n=3, min_length=6, max_entries=5000, max_candidates=64, max_edits=2):
+        self.threshold = threshold
+        self.max_edits = max_edits
+        self.n = n
+        self.min_length = min_length  # 过短的文本差一个字符含义就可能不同，不做模糊匹配
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self._entries = OrderedDict()  # cache key -> (pair, grams, normalized, guard)
+        self._postings = {}  # (pair, gram) -> set(cache key)
+
+    def _grams(self, normalized):
+        if len(normalized) <= self.n:
+            return frozenset([normalized])
+        return frozenset(normalized[i:i + self.n] for i in range(len(normalized) - self.n + 1))
+
+    def add(self, text, pair, key):
+        normalized = fuzzy_normalize(text)
+        if len(normalized) < self.min_length or key in self._entries:
+            return
+        grams = self._grams(normalized)
+        self._entries[key] = (pair, grams, normalized, fuzzy_guard(text))
+        for gram in grams:
+            self._postings.setdefault((pair, gram), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(*self._entries.popitem(last=False))
+
+    def _remove(self, key, entry):
+        pair, grams = entry[:2]
+        for gram in grams:
+            posting = self._postings.get((pair, gram))
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[(pair, gram)]
+
+    def lookup(self, text, pair):
+        """返回最相似条目的 cache key，相似度低于阈值时返回 None"""
+        normalized = fuzzy_normalize(text)
+        if len(normalized) < self.min_length:
+            return None
+        grams = self._grams(normalized)
+
+        # Dice >= t 时两者至少共享 t*|A|/(2-t) 个 n-gram，只需检查最稀有的那部分
+        required = int(self.threshold * len(grams) / (2 - self.threshold))
+        prefix_size = len(grams) - required + 1
+        rare = sorted(grams, key=lambda gram: len(self._postings.get((pair, gram), ())))[:prefix_size]
+
+        candidates = Counter()
+        for gram in rare:
+            candidates.update(self._postings.get((pair, gram), ()))
+
+        guard = fuzzy_guard(text)
+        best_key, best_score = None, self.threshold
+        for key, _ in candidates.most_common(self.max_candidates):
+            _, other, other_normalized, other_guard = self._entries[key]
+            score = 2.0 * len(grams & other) / (len(grams) + len(other))
+            if score < best_score or other_guard != guard:
+                continue
+            if within_ocr_edits(normalized, other_normalized, self.max_edits):
+                best_key, best_score = key, score
+        return best_key
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TranslationCache:
+    def __init__(self, db_path=None, max_bytes=8 * 1024 * 1024, ttl=30 * 24 * 3600, fuzzy_threshold=0.85):
+        self.db_path = db_path or default_cache_path()
+        self.max_bytes = max_bytes  # 内存层的字节预算
+        self.ttl = ttl  # 条目有效期（秒），None 表示永不过期
+        self._memory = OrderedDict()  # key -> (translation, expires_at, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()  # sqlite 连接不能跨线程共享
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.fuzzy_hits = 0  # 精确查找未命中、通过模糊匹配省下的网络请求
+        self.fuzzy = FuzzyIndex(threshold=fuzzy_threshold)
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " translation TEXT NOT NULL,"
+                " expires_at REAL)"
+            )
+            # 旧版本的缓存没有原文列，补上后才能建立模糊索引
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(translations)")]
+            if 'source' not in columns:
+                conn.execute("ALTER TABLE translations ADD COLUMN source TEXT")
+                conn.execute("ALTER TABLE translations ADD COLUMN pair TEXT")
+            conn.execute("DELETE FROM translations WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+        self._load_fuzzy_index(conn)
+        logging.info(f"📁 translation cache: {self.db_path}")
+
+    def _load_fuzzy_index(self, conn):
+        rows = conn.execute(
+            "SELECT key, source, pair FROM translations WHERE source IS NOT NULL ORDER BY rowid DESC LIMIT ?",
+            (self.fuzzy.max_entries,),
+        ).fetchall()
+        with self._lock:
+            for key, source, pair in reversed(rows):
+                self.fuzzy.add(source, pair, key)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(text, src, dest):
+        return hashlib.sha256(f"{src}|{dest}|{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, translation, expires_at):
+        """写入内存层，并按字节预算淘汰最久未使用的条目（调用方持有锁）"""
+        size = len(key) + len(translation.encode('utf-8'))
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[2]
+        self._memory[key] = (translation, expires_at, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def get(self, text, src, dest, fuzzy=False):
+        """fuzzy=True 时精确查找未命中再做容忍 OCR 误识别的近似查找；每次查找只计入一项统计"""
+        with get_metrics().timer('cache_lookup'):
+            translation = self._get_by_key(self.make_key(text, src, dest))
+        if translation is None and fuzzy:
+            translation = self._get_fuzzy(text, src, dest)
+            if translation is not None:
+                return translation
+        if translation is None:
+            with self._lock:
+                self.misses += 1
+        return translation
+
+    def _get_fuzzy(self, text, src, dest):
+        with get_metrics().timer('cache_fuzzy_lookup'):
+            with self._lock:
+                key = self.fuzzy.lookup(text, f"{src}|{dest}")
+            translation = self._get_by_key(key, count=False) if key is not None else None
+        if translation is not None:
+            with self._lock:
+                self.fuzzy_hits += 1
+            logging.debug(f"Fuzzy cache hit for '{text[:30]}'")
+        return translation
+
+    def _get_by_key(self, key, count=True):
+        """count=False 时不计入内存/磁盘命中（模糊查找单独统计）"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] >= now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += count
+                    return entry[0]
+                self._memory_bytes -= entry[2]
+                del self._memory[key]
+
+        try:
+            row = self._connection().execute(
+                "SELECT translation, expires_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ translation cache read error: {e}")
+            row = None
+
+        if row is not None and (row[1] is None or row[1] >= now):
+            with self._lock:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += count
+            return row[0]
+        return None
+
+    def put(self, text, src, dest, translation):
+        key = self.make_key(text, src, dest)
+        pair = f"{src}|{dest}"
+        source = normalize_text(text)
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._remember(key, translation, expires_at)
+            self.fuzzy.add(source, pair, key)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translations (key, translation, expires_at, source, pair) VALUES (?, ?, ?, ?, ?)",
+                    (key, translation, expires_at, source, pair),
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ translation cache write error: {e}")
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.fuzzy_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'fuzzy_hits': self.fuzzy_hits,
+                'fuzzy_entries': len(self.fuzzy),
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """进程内共用的翻译缓存"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TranslationCache()
+        return _shared_cache
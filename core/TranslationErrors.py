@@ -0,0 +1,40 @@
+'''
+翻译调用的截止时间和错误类型
+'''
+import time
+
+
+class TranslationError(Exception):
+    """翻译失败（不应重试，例如语言不支持、鉴权失败）"""
+
+
+class TransientTranslationError(TranslationError):
+    """暂时性错误（网络错误、限流、服务端 5xx），在截止时间内可以重试"""
+
+
+class TranslationTimeout(TranslationError):
+    """在截止时间之前没有拿到结果"""
+
+
+class TranslationCancelled(TranslationError):
+    """请求被取消（例如有了更新的画面）"""
+
+
+class Deadline:
+    """从创建时刻开始计时的截止时间"""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def check_cancelled(cancel_token):
+    """cancel_token 是任何带 cancelled 属性的对象（例如 Pipeline.Job）"""
+    if cancel_token is not None and cancel_token.cancelled:
+        raise TranslationCancelled("translation cancelled")
@@ -1,24 +1,29 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QCheckBox
-from PyQt5.QtCore import QTimer, Qt, QPoint
+from PyQt5.QtCore import QTimer, Qt, QPoint, pyqtSignal
 from PyQt5.QtGui import QMouseEvent
 import logging
+import os
 import time
-from concurrent.futures import ThreadPoolExecutor
 
 from ScreenCapture import ScreenCapture
-from OcrEngine import OcrEngine
-from TranslatorEngine import TranslatorEngine
+from FrameRecorder import FrameRecorder
+from FrameChangeDetector import FrameChangeDetector
+from Pipeline import Pipeline, Stage
+from AdaptiveScheduler import AdaptiveScheduler, widget_inactive
+from Metrics import get_metrics
+from OcrWorker import OcrWorkerClient
 
 
 class TranslationWindow(QWidget):
+    # 后台流水线的结果通过信号回到主线程更新界面
+    result_ready = pyqtSignal(str, str)
+
     def __init__(self, parent=None):
         super().__init__()
         self.parent = parent
         # 初始化核心功能模块
-        self.capture = ScreenCapture()
-        self.ocr = OcrEngine()
-        self.translator = TranslatorEngine()
-        self.google_available = self.check_google_connectivity()
+        self.capture = ScreenCapture(recorder=FrameRecorder.from_env())
+        self.change_detector = FrameChangeDetector(threshold=0.002)
         self.last_text = ""
         self.selected_rect = None
         self.logger = logging.getLogger(__name__)
@@ -26,18 +31,40 @@ class TranslationWindow(QWidget):
         # Mouse tracking variables
         self.dragging = False
         self.drag_position = QPoint()
-        self.last_process_time = time.time()
-        self.process_interval = 0.5  # 处理间隔500ms
-        self.translation_cache = {}
-        self.thread_pool = ThreadPoolExecutor(max_workers=1)
+        self.draggable_overlay = None
+        self.translation_timeout = 8.0  # 单帧翻译的截止时间（秒）
+
+        # 截图 → OCR → 翻译 三个阶段，每个阶段只保留最新的一帧。
+        # 默认 OCR 和翻译在独立的工作进程中执行（帧经共享内存传递），界面进程只截图和显示；
+        # 设置 OCR_WORKER=thread 时三个阶段都在本进程的线程中执行
+        self.metrics = get_metrics()
+        stages = [Stage('capture', self.capture_stage, cancel_superseded=False)]
+        if os.getenv('OCR_WORKER', 'process') == 'process':
+            self.frame_translator = None
+            # 工作进程的耗时统计和组件计数转发到本进程的 metrics，一起在 HUD 和 Prometheus 中导出
+            self.worker = OcrWorkerClient(self.deliver_result, on_failure=self.change_detector.reset,
+                                          translation_timeout=self.translation_timeout, metrics=self.metrics)
+        else:
+            from FrameTranslator import FrameTranslator
+            self.worker = None
+            self.frame_translator = FrameTranslator(self.translation_timeout, on_failure=self.change_detector.reset)
+            self.frame_translator.register_metrics(self.metrics)
+            stages += self.frame_translator.stages()
+        self.pipeline = Pipeline(stages, on_result=lambda result: self.deliver_result(*result),
+                                 name='translation-pipeline')
+        self.result_ready.connect(self.update_ui)
 
         self.setCursor(Qt.SizeAllCursor)
         self.setMouseTracking(True)
 
-        # Initialize timer for periodic updates
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_process)
-        self.timer.setInterval(500)
+        # 截图调度：画面变化后 100ms 轮询，静止时逐步退避到 2s，浮窗不可见或拖动时暂停
+        self.scheduler = AdaptiveScheduler(self.process, self.should_pause, parent=self)
+
+        # 各组件的计数一起导出，耗时直方图由各组件自己记录
+        self.metrics.register_collector('pipeline', self.pipeline.stats)
+        self.metrics.register_collector('frames', self.change_detector.stats)
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.update_hud)
 
         # 支持的语言代码映射
         self.languages = {
@@ -48,7 +75,11 @@ class TranslationWindow(QWidget):
             'Chinese (Traditional)': 'chi_tra'
         }
 
+        # 源语言额外提供自动检测
+        self.source_languages = {'Auto': 'auto', **self.languages}
+
         self.translator_codes = {
+            'auto': 'auto',
             'chi_sim': 'zh-cn',
             'eng': 'en',
             'jpn': 'ja',
@@ -71,7 +102,7 @@ class TranslationWindow(QWidget):
         lang_layout = QHBoxLayout()
 
         self.src_lang = QComboBox()
-        self.src_lang.addItems(self.languages.keys())
+        self.src_lang.addItems(self.source_languages.keys())
         self.src_lang.setCurrentText('English')
         self.src_lang.setStyleSheet("""
                     QComboBox {
@@ -127,6 +158,10 @@ class TranslationWindow(QWidget):
                 """)
         lang_layout.addWidget(self.dest_lang)
 
+        # 切换语言后即使画面不变也需要重新识别
+        self.src_lang.currentTextChanged.connect(self.on_language_changed)
+        self.dest_lang.currentTextChanged.connect(self.on_language_changed)
+
         # Show original text checkbox
         self.show_original = QCheckBox("Show Original")
         self.show_original.setStyleSheet("""
@@ -152,6 +187,12 @@ class TranslationWindow(QWidget):
         self.show_original.stateChanged.connect(self.handle_show_original)
         lang_layout.addWidget(self.show_original)
 
+        # Latency HUD checkbox
+        self.show_stats = QCheckBox("Stats")
+        self.show_stats.setStyleSheet(self.show_original.styleSheet())
+        self.show_stats.stateChanged.connect(self.handle_show_stats)
+        lang_layout.addWidget(self.show_stats)
+
         layout.addLayout(lang_layout)
 
         # Original text label
@@ -181,14 +222,26 @@ class TranslationWindow(QWidget):
                 """)
         layout.addWidget(self.translation_label)
 
+        # 各阶段耗时 HUD
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("""
+                    QLabel {
+                        background-color: rgba(0, 0, 0, 0.8);
+                        color: rgba(255, 255, 255, 0.8);
+                        font-family: monospace;
+                        font-size: 10px;
+                        padding: 5px;
+                        border-radius: 5px;
+                    }
+                """)
+        self.stats_label.hide()
+        layout.addWidget(self.stats_label)
+
         self.setLayout(layout)
 
-    def check_process(self):
-        """检查是否需要处理"""
-        current_time = time.time()
-        if current_time - self.last_process_time >= self.process_interval and not self.dragging:
-            self.process()
-            self.last_process_time = current_time
+    def should_pause(self):
+        """拖动翻译窗口，或选区浮窗隐藏/拖动/被遮挡时不截图"""
+        return self.dragging or widget_inactive(self.draggable_overlay)
 
     def process(self):
         """处理翻译请求"""
@@ -198,55 +251,51 @@ class TranslationWindow(QWidget):
             return
 
         try:
-            # Submit all heavy operations to thread pool
-            self.thread_pool.submit(self.process_in_background, self.selected_rect)
+            # 语言选择在主线程读取，随任务一起进入流水线
+            src_lang = self.source_languages[self.src_lang.currentText()]
+            context = {
+                'src_lang': src_lang,
+                'region': (self.selected_rect.x(), self.selected_rect.y(),
+                           self.selected_rect.width(), self.selected_rect.height()),
+                'src_lang_code': self.translator_codes[src_lang],
+                'dest_lang_code': self.translator_codes[self.languages[self.dest_lang.currentText()]],
+                'submitted_at': time.perf_counter(),
+            }
+            self.pipeline.submit(self.selected_rect, context)
         except Exception as e:
             self.logger.error(f"Process error: {str(e)}")
 
-    def process_in_background(self, rect):
-        """Execute capture, OCR and translation in background"""
-        logging.info("🔄 Processing in background...")
-        try:
-            # Capture screen
-            img = self.capture.capture_area(rect)
-            if img is None:
-                logging.info("❌ Failed to capture screen")
-                return
-
-            # Perform OCR
-            src_lang = self.languages[self.src_lang.currentText()]
-            text = self.ocr.extract_text(img, src_lang)
-
-            if not text:
-                logging.info("❌ OCR failed to extract text")
-                return
-
-            current_text = text.strip()
-            if current_text == self.last_text.strip():
-                return
-
-            # Get language codes
-            src_lang_code = self.translator_codes[src_lang]
-            dest_lang_code = self.translator_codes[self.languages[self.dest_lang.currentText()]]
-
-            # Check cache
-            cache_key = f"{current_text}_{src_lang_code}_{dest_lang_code}"
-            if cache_key in self.translation_cache:
-                self.update_ui(text, self.translation_cache[cache_key])
-                return
-
-            # Perform translation
-            # translation = self.translator.translate(text, src=src_lang_code, dest=dest_lang_code)
-            if self.google_available:
-                translation = self.translator.translate(text, src=src_lang_code, dest=dest_lang_code)
-            else:
-                translation = self.translator.youdao_translate(text, src=src_lang_code, dest=dest_lang_code)
-            self.translation_cache[cache_key] = translation
-            self.translation_cache[cache_key] = translation
-            self.update_ui(text, translation)
-
-        except Exception as e:
-            self.logger.error(f"Background process error: {str(e)}")
+    def capture_stage(self, job):
+        """截图，并跳过没有变化的画面"""
+        img = self.capture.capture_area(job.value)
+        if img is None:
+            logging.info("❌ Failed to capture screen")
+            return None
+
+        # Skip OCR when the region did not change
+        changed = self.change_detector.has_changed(img)
+        self.scheduler.activity.emit(bool(changed))
+        if not changed:
+            return None
+        if self.worker is not None:
+            self.worker.submit(img, job.context)
+            return None
+        return img
+
+    def deliver_result(self, text, translation, submitted_at=None):
+        """流水线或工作进程产出译文时调用（后台线程）"""
+        if submitted_at is not None:
+            # 从提交截图到拿到译文的总耗时（只统计真正产出结果的帧）
+            self.metrics.observe('end_to_end', time.perf_counter() - submitted_at)
+        self.result_ready.emit(text, translation)
+
+    def on_language_changed(self, _):
+        """切换语言后即使画面不变也需要重新识别和翻译"""
+        self.change_detector.reset()
+        if self.worker is not None:
+            self.worker.reset()
+        else:
+            self.frame_translator.reset()
 
     # def translate_in_background(self, text, src_lang_code, dest_lang_code, cache_key):
     #     """在后台线程中执行翻译"""
@@ -257,17 +306,6 @@ class TranslationWindow(QWidget):
     #     except Exception as e:
     #         self.logger.error(f"Translation error: {str(e)}")
 
-    def check_google_connectivity(self):
-        """Check if Google Translate service is accessible"""
-        import socket
-        try:
-            socket.create_connection(("translate.google.com", 80), timeout=3)
-            logging.info("✅ Google Translate is accessible")
-            return True
-        except (socket.timeout, socket.gaierror):
-            logging.warning("⚠️ Cannot reach Google Translate, will use Youdao")
-            return False
-
     def update_ui(self, text, translation):
         """更新UI界面"""
         self.last_text = text
@@ -285,6 +323,30 @@ class TranslationWindow(QWidget):
         else:
             self.original_label.hide()
 
+    def handle_show_stats(self, state):
+        if state:
+            self.update_hud()
+            self.stats_label.show()
+            self.hud_timer.start(1000)
+        else:
+            self.hud_timer.stop()
+            self.stats_label.hide()
+
+    def update_hud(self):
+        lines = self.metrics.summary_lines()
+        frames = self.change_detector.stats()
+        lines.append(f"frames skipped: {frames['skip_ratio']:.0%}  next capture in {self.scheduler.interval}ms")
+        self.stats_label.setText("\n".join(lines))
+
+    def closeEvent(self, event):
+        """关闭窗口时停止截图和流水线，结束 OCR 工作进程并释放共享内存"""
+        self.scheduler.stop()
+        self.hud_timer.stop()
+        self.pipeline.stop()
+        if self.worker is not None:
+            self.worker.stop()
+        super().closeEvent(event)
+
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
             self.dragging = True
@@ -311,4 +373,7 @@ class TranslationWindow(QWidget):
         if not self.isVisible():
             self.show()
         self.move(rect.x(), rect.y() - self.height())
-        self.timer.start()
\ No newline at end of file
+        if self.worker is not None:
+            self.worker.start()
+        self.pipeline.start()
+        self.scheduler.start()
\ No newline at end of file
@@ -4,16 +4,28 @@
 import hashlib
 import logging
 import os
+import random
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 import googletrans
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 # TranslatorEngine.py
 # 翻译模块，调用googletrans库
 
 from googletrans import Translator
 
+from Metrics import get_metrics
+from ProviderRouter import ProviderRouter
+from RateLimiter import ProviderLimiter
+from SingleFlight import SingleFlight
+from TranslationErrors import (
+    Deadline, TranslationError, TransientTranslationError, TranslationTimeout, TranslationCancelled, check_cancelled
+)
+
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
@@ -24,6 +36,12 @@ def encrypt(signStr):
     return hash_algorithm.hexdigest()
 
 
+# googletrans 抛出的网络类异常（httpx 0.13 的网络异常来自 httpcore，不继承 HTTPError）
+GOOGLE_TRANSIENT_ERRORS = tuple(
+    getattr(httpx, name) for name in ('HTTPError', 'TimeoutException', 'NetworkError', 'ProtocolError') if hasattr(httpx, name)
+) + (OSError,)
+
+
 def truncate(q):
     """截断函数：用于签名"""
     if q is None:
@@ -32,47 +50,243 @@ def truncate(q):
     return q if size <= 20 else q[:10] + str(size) + q[-10:]
 
 class TranslatorEngine:
-    def __init__(self):
-        self.translator = Translator()
+    # 各翻译服务单次请求的字符数上限和条数上限
+    CHAR_LIMITS = {'google': 5000, 'youdao': 5000}
+    ITEM_LIMITS = {'google': 100, 'youdao': 50}
+    # Google 没有批量接口，用换行拼接多段文本后再拆分
+    GOOGLE_BATCH_SEPARATOR = '\n'
+    # 各翻译服务的并发数和速率上限，避免被限流
+    PROVIDER_LIMITS = {
+        'google': {'max_concurrency': 4, 'requests_per_second': 5, 'chars_per_second': 5000},
+        'youdao': {'max_concurrency': 4, 'requests_per_second': 5, 'chars_per_second': 10000},
+    }
+    # 有道使用自己的语言代码
+    YOUDAO_LANG_CODES = {'zh-cn': 'zh-CHS', 'zh-tw': 'zh-CHT'}
+    # 有道的限流错误码，可以重试
+    YOUDAO_TRANSIENT_ERRORS = {'411', '412'}
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, youdao_url=None, hedge=True,
+                 default_deadline=15.0, max_retries=3, backoff_base=0.25, backoff_max=2.0):
+        # (连接超时, 读取超时)，所有 HTTP 翻译服务共用
+        self.timeout = (connect_timeout, read_timeout)
+        self.default_deadline = default_deadline  # 调用方没有给出截止时间时使用
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.youdao_url = youdao_url or os.getenv('YOUDAO_API_URL', 'https://openapi.youdao.com/api')
+        self.youdao_batch_url = os.getenv('YOUDAO_BATCH_API_URL', self.youdao_url.rstrip('/').rsplit('/', 1)[0] + '/v2/api')
+
+        # 长连接池：复用 DNS/TCP/TLS，新的翻译服务也应通过 self.session 发请求
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # googletrans 内部持有一个 httpx.Client，本身就会复用连接，这里只补上超时
+        self.translator = Translator(timeout=httpx.Timeout(read_timeout, connect_timeout=connect_timeout))
+        # googletrans 不支持单次调用的超时，在独立线程中执行以便按截止时间放弃等待
+        self._google_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='google-translate')
+
+        # 按实时延迟和错误率在 Google / 有道之间选择
+        self.router = ProviderRouter(['google', 'youdao'], hedge=hedge)
+
+        # 正在进行中的相同请求只发一次
+        self.single_flight = SingleFlight()
+        self.limiters = {name: ProviderLimiter(**limits) for name, limits in self.PROVIDER_LIMITS.items()}
+
+    def resolve_deadline(self, deadline):
+        return deadline if deadline is not None else Deadline(self.default_deadline)
+
+    def _with_retries(self, fn, deadline, cancel_token):
+        """执行 fn()，暂时性错误按指数退避 + 随机抖动重试，直到成功、次数用完或截止时间到"""
+        attempt = 0
+        while True:
+            check_cancelled(cancel_token)
+            if deadline.expired:
+                raise TranslationTimeout("translation deadline exceeded")
+            try:
+                return fn()
+            except TransientTranslationError as e:
+                attempt += 1
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                if attempt > self.max_retries or delay >= deadline.remaining():
+                    if deadline.remaining() <= delay:
+                        raise TranslationTimeout(f"translation deadline exceeded: {e}") from e
+                    raise
+                logging.info(f"🔁 transient translation error ({e}), retry {attempt} in {delay:.2f}s")
+                # 分段睡眠，以便及时响应取消
+                wake_at = time.monotonic() + delay
+                while time.monotonic() < wake_at:
+                    check_cancelled(cancel_token)
+                    time.sleep(min(0.05, max(0.0, wake_at - time.monotonic())))
+
+    def translate(self, text, src='en', dest='zh-cn', deadline=None, cancel_token=None):
+        """Google 翻译；失败时抛出 TranslationError / TranslationTimeout / TranslationCancelled"""
+        deadline = self.resolve_deadline(deadline)
+        with get_metrics().timer('translate', ignore=(TranslationCancelled,)):
+            return self.single_flight.do(
+                ('google', text, src, dest),
+                lambda: self._with_retries(lambda: self._google_translate(text, src, dest, deadline, cancel_token), deadline, cancel_token),
+            )
 
-    def translate(self, text, src='en', dest='zh-cn'):
+    def _google_translate(self, text, src, dest, deadline, cancel_token=None):
+        def call():
+            with self.limiters['google'].limit(len(text)):
+                return self.translator.translate(text, src=src, dest=dest)
+
+        # 调用Google Translate进行翻译
+        start_time = time.time()
+        future = self._google_executor.submit(call)
+        wait_until = time.monotonic() + min(self.timeout[1], deadline.remaining())
         try:
-            # 调用Google Translate进行翻译
-            # result = self.translator.translate(text, src=src, dest=dest)
-            start_time = time.time()
-            # print(f"Translating text: {text} from {src} to {dest}")
-            result = self.translator.translate(text, src=src, dest=dest)
-            elapsed_time = time.time() - start_time
-            logging.info(f"Translation took {elapsed_time:.2f} seconds")
-            return result.text
+            # 分段等待，以便及时响应取消；被放弃的请求会在 httpx 自己的超时后结束
+            while True:
+                check_cancelled(cancel_token)
+                try:
+                    result = future.result(timeout=max(0.0, min(0.1, wait_until - time.monotonic())))
+                    break
+                except FutureTimeout:
+                    if time.monotonic() >= wait_until:
+                        raise
+        except FutureTimeout:
+            if deadline.expired:
+                raise TranslationTimeout("google translation timed out")
+            raise TransientTranslationError("google request timed out")
+        except TranslationError:
+            raise
+        except GOOGLE_TRANSIENT_ERRORS as e:
+            raise TransientTranslationError(f"google network error: {e}") from e
         except Exception as e:
-            # 出错返回提示
-            return f"translation failure: {str(e)}"
+            raise TranslationError(f"google translation failed: {e}") from e
+        elapsed_time = time.time() - start_time
+        logging.info(f"Translation took {elapsed_time:.2f} seconds")
+        if not result or not getattr(result, 'text', None):
+            raise TranslationError("google returned an empty translation")
+        return result.text
+
+    ########### 批量翻译 ##############
+
+    def translate_batch(self, texts, src='en', dest='zh-cn', provider=None, deadline=None, cancel_token=None):
+        """批量翻译，按服务限制把多段文本打包成尽量少的请求，返回与 texts 一一对应的译文
+
+        provider 为 None 时由 self.router 为每个请求选择服务。
+        其他线程正在翻译的相同文本不会重复请求，而是等待那次请求的结果。
+        失败时抛出 TranslationError / TranslationTimeout / TranslationCancelled。
+        """
+        with get_metrics().timer('translate_batch', ignore=(TranslationCancelled,)):
+            return self._translate_shared(texts, src, dest, provider, self.resolve_deadline(deadline), cancel_token)
+
+    def _translate_shared(self, texts, src, dest, provider, deadline, cancel_token):
+        pending = list(dict.fromkeys(texts))
+        results = {}
+        while pending:
+            futures = {}
+            owned = []
+            for text in pending:
+                future, leader = self.single_flight.claim((provider or 'auto', text, src, dest))
+                futures[text] = future
+                if leader:
+                    owned.append(text)
+
+            if owned:
+                try:
+                    translations = self._translate_batch(owned, src, dest, provider, deadline, cancel_token)
+                except BaseException as e:
+                    for text in owned:
+                        self.single_flight.fail((provider or 'auto', text, src, dest), e)
+                    raise
+                for text, translation in zip(owned, translations):
+                    self.single_flight.resolve((provider or 'auto', text, src, dest), translation)
+
+            retry = []
+            for text in pending:
+                try:
+                    results[text] = futures[text].result(timeout=deadline.remaining())
+                except FutureTimeout:
+                    raise TranslationTimeout("translation deadline exceeded while waiting for a shared request")
+                except TranslationCancelled:
+                    # 共享的那次请求被它的发起者取消了，由自己重新请求
+                    retry.append(text)
+            check_cancelled(cancel_token)
+            pending = retry
+        return [results[text] for text in texts]
 
+    def split_batches(self, texts, provider=None):
+        """按服务的单次请求限制分组，返回下标列表的列表"""
+        if provider is None:
+            limit = min(self.CHAR_LIMITS.values())
+            max_items = min(self.ITEM_LIMITS.values())
+        else:
+            limit = self.CHAR_LIMITS[provider]
+            max_items = self.ITEM_LIMITS[provider]
+        return list(self._chunk(texts, limit, max_items, len(self.GOOGLE_BATCH_SEPARATOR)))
 
+    def _translate_batch(self, texts, src, dest, provider, deadline, cancel_token):
+        results = [None] * len(texts)
+        for chunk in self.split_batches(texts, provider):
+            queries = [texts[i] for i in chunk]
+            if provider is None:
+                # 每次重试都重新选择服务，失败过的服务得分会变差
+                translations = self._with_retries(
+                    lambda: self.router.call(lambda name: self._provider_batch(name, queries, src, dest, deadline, cancel_token), deadline, cancel_token),
+                    deadline, cancel_token)
+            else:
+                translations = self._with_retries(
+                    lambda: self._provider_batch(provider, queries, src, dest, deadline, cancel_token), deadline, cancel_token)
+            for i, translation in zip(chunk, translations):
+                results[i] = translation
+        return results
+
+    def _provider_batch(self, provider, queries, src, dest, deadline, cancel_token=None):
+        # 单次服务请求的耗时（不含排队、重试和对冲等待）
+        with get_metrics().timer(f'provider_{provider}', ignore=(TranslationCancelled,)):
+            if provider == 'youdao':
+                return self._youdao_batch(queries, src, dest, deadline)
+            return self._google_batch(queries, src, dest, deadline, cancel_token)
+
+    @staticmethod
+    def _chunk(texts, limit, max_items, separator_size):
+        """把文本下标分组，每组总字符数不超过 limit（单段超长的文本单独成组）"""
+        chunk, size = [], 0
+        for i, text in enumerate(texts):
+            extra = len(text) + (separator_size if chunk else 0)
+            if chunk and (size + extra > limit or len(chunk) >= max_items):
+                yield chunk
+                chunk, size, extra = [], 0, len(text)
+            chunk.append(i)
+            size += extra
+        if chunk:
+            yield chunk
+
+    def _google_batch(self, queries, src, dest, deadline, cancel_token=None):
+        if len(queries) == 1:
+            return [self._google_translate(queries[0], src, dest, deadline, cancel_token)]
+        # 文本内部的换行会破坏拆分，先替换为空格
+        joined = self.GOOGLE_BATCH_SEPARATOR.join(q.replace('\n', ' ') for q in queries)
+        parts = self._google_translate(joined, src, dest, deadline, cancel_token).split(self.GOOGLE_BATCH_SEPARATOR)
+        if len(parts) != len(queries):
+            logging.warning(f"⚠️ batch split mismatch ({len(parts)} != {len(queries)}), translating one by one")
+            return [self._google_translate(q, src, dest, deadline, cancel_token) for q in queries]
+        return [part.strip() for part in parts]
 
     ########### 有道翻译 ##############
 
-    def youdao_translate(self, query, src='en', dest='zh-cn'):
+    def _youdao_form(self, queries, src, dest):
+        """生成带签名的请求参数；多段文本时签名使用拼接后的文本"""
         appKey = os.getenv('YOUDAO_APP_KEY', '264bff87c4ee74be')  # Get AppKey from environment variable
         appSecret = os.getenv('YOUDAO_APP_SECRET', 'Uq2cK2P2k64DbeFKRcMWDFXKv9dVgKuH')  # Get AppSecret from environment variable
         if not appKey or not appSecret:
             raise ValueError("YOUDAO_APP_KEY and YOUDAO_APP_SECRET environment variables must be set")
-        url = 'https://openapi.youdao.com/api'
 
         salt = str(uuid.uuid4())
         curtime = str(int(time.time()))
-        signStr = appKey + truncate(query) + salt + curtime + appSecret
+        signStr = appKey + truncate(''.join(queries)) + salt + curtime + appSecret
         sign = encrypt(signStr)
 
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-
-        data = {
-            'q': query,
-            'from': src,
-            'to': dest,
+        return {
+            'q': queries if len(queries) > 1 else queries[0],
+            'from': self.YOUDAO_LANG_CODES.get(src, src),
+            'to': self.YOUDAO_LANG_CODES.get(dest, dest),
             'appKey': appKey,
             'salt': salt,
             'sign': sign,
@@ -80,12 +294,63 @@ class TranslatorEngine:
             'curtime': curtime,
         }
 
-        start_time = time.time()
-        response = requests.post(url, data=data, headers=headers)
-        result = response.json()
+    def _youdao_post(self, url, queries, src, dest, deadline):
+        """发送一次有道请求并检查错误码，返回 JSON"""
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise TranslationTimeout("translation deadline exceeded")
+        timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        try:
+            with self.limiters['youdao'].limit(sum(len(q) for q in queries)):
+                response = self.session.post(url, data=self._youdao_form(queries, src, dest), headers=headers, timeout=timeout)
+        except requests.Timeout as e:
+            if deadline.expired:
+                raise TranslationTimeout(f"youdao request timed out: {e}") from e
+            raise TransientTranslationError(f"youdao request timed out: {e}") from e
+        except requests.RequestException as e:
+            raise TransientTranslationError(f"youdao network error: {e}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientTranslationError(f"youdao HTTP {response.status_code}")
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise TranslationError(f"youdao returned invalid JSON: {e}") from e
 
-        # 提取翻译结果
-        translation = result.get('translation', [])
+        error_code = str(result.get('errorCode', '0'))
+        if error_code in self.YOUDAO_TRANSIENT_ERRORS:
+            raise TransientTranslationError(f"youdao rate limited (errorCode {error_code})")
+        if error_code != '0':
+            raise TranslationError(f"youdao errorCode {error_code}")
+        return result
+
+    def _youdao_batch(self, queries, src, dest, deadline):
+        start_time = time.time()
+        result = self._youdao_post(self.youdao_batch_url, queries, src, dest, deadline)
+        items = result.get('translateResults') or []
         elapsed_time = time.time() - start_time
-        logging.info(f"youdao Translation took {elapsed_time:.2f} seconds")
-        return translation[0] if translation else "翻译失败"
+        logging.info(f"youdao batch Translation of {len(queries)} segments took {elapsed_time:.2f} seconds")
+        if len(items) != len(queries) or not all(item.get('translation') for item in items):
+            raise TranslationError(f"youdao batch returned {len(items)} results for {len(queries)} segments")
+        return [item['translation'] for item in items]
+
+    def youdao_translate(self, query, src='en', dest='zh-cn', deadline=None, cancel_token=None):
+        """有道翻译；失败时抛出 TranslationError / TranslationTimeout / TranslationCancelled"""
+        deadline = self.resolve_deadline(deadline)
+
+        def call():
+            start_time = time.time()
+            result = self._youdao_post(self.youdao_url, [query], src, dest, deadline)
+
+            # 提取翻译结果
+            translation = result.get('translation', [])
+            elapsed_time = time.time() - start_time
+            logging.info(f"youdao Translation took {elapsed_time:.2f} seconds")
+            if not translation:
+                raise TranslationError("youdao returned an empty translation")
+            return translation[0]
+
+        return self._with_retries(call, deadline, cancel_token)
@@ -0,0 +1,192 @@
+'''
+批量识别并翻译一个目录中的截图/视频帧，不需要 Qt 界面
+
+用法:
+    python -m core.batch screenshots/ -o results.jsonl [--lang eng] [--src en] [--dest zh-cn] [--workers 8]
+
+OCR 在进程池中并行执行（默认每个 CPU 核一个进程），识别结果按批合并、去重后翻译，
+每处理完一批就把结果逐行追加到 JSONL 文件。中断后用同样的命令重新运行会跳过已经成功的文件，
+之前失败的文件重新处理，结果文件中它们的旧记录会被删除，每个文件只保留一条记录。
+'''
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# 其他模块使用 core 目录内的平铺导入
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from OcrEngine import OcrEngine
+from SegmentTranslator import SegmentTranslator
+from TranslationCache import get_shared_cache
+from TranslationErrors import TranslationError
+from TranslatorEngine import TranslatorEngine
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tif', '.tiff')
+
+_worker_ocr = None
+
+
+def _init_worker():
+    global _worker_ocr
+    # 进程数已经等于核数，限制 tesseract 自己的 OpenMP 线程，避免互相争抢
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    _worker_ocr = OcrEngine()
+
+
+def _ocr_file(path, lang):
+    """在工作进程中识别一个文件，返回 (path, text, 耗时, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        with Image.open(path) as img:
+            text = _worker_ocr.extract_text(img.convert('RGB'), lang)
+        return path, text or '', time.perf_counter() - start, None
+    except Exception as e:
+        return path, '', time.perf_counter() - start, f"ocr failed: {e}"
+
+
+def find_images(root):
+    if os.path.isfile(root):
+        return [root]
+    paths = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(directory, name))
+    return sorted(paths)
+
+
+def load_completed(output):
+    """整理已有的结果文件并返回已经成功处理的文件
+
+    只保留每个文件最后一条成功的记录：失败的记录会在这次运行中被新结果取代，
+    中断时写了一半的最后一行也一起去掉。
+    """
+    if not os.path.exists(output):
+        return set()
+    succeeded = {}
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not record.get('error'):
+                succeeded[record['path']] = line.rstrip('\n')
+    # 先写临时文件再替换，整理过程中被中断也不会丢失已有结果
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line in succeeded.values():
+            f.write(line + '\n')
+    os.replace(tmp_path, output)
+    return set(succeeded)
+
+
+class BatchTranslator:
+    def __init__(self, output, src, dest, lang, provider=None, workers=None, batch_size=32):
+        self.output = output
+        self.src = src
+        self.dest = dest
+        self.lang = lang
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.engine = TranslatorEngine()
+        self.segment_translator = SegmentTranslator(
+            lambda texts, src, dest, cancel_token=None: self.engine.translate_batch(
+                texts, src, dest, provider, cancel_token=cancel_token),
+            get_shared_cache())
+        self.written = 0
+        self.errors = 0
+
+    def run(self, root, resume=True):
+        paths = find_images(root)
+        base = root if os.path.isdir(root) else os.path.dirname(root)
+        completed = load_completed(self.output) if resume else set()
+        todo = [path for path in paths if os.path.relpath(path, base) not in completed]
+        logging.info(f"📂 {len(paths)} image(s) found, {len(paths) - len(todo)} already done, {len(todo)} to process")
+        if not todo:
+            return
+
+        # 语言文件只在主进程下载一次，避免多个工作进程同时下载
+        OcrEngine().ensure_language(self.lang)
+
+        with open(self.output, 'a' if resume else 'w', encoding='utf-8') as out:
+            pending = []
+            in_flight = set()
+            queue = iter(todo)
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+                # 只保持有限的在途任务，目录很大时也不会一次提交全部文件
+                for path in queue:
+                    in_flight.add(pool.submit(_ocr_file, path, self.lang))
+                    if len(in_flight) >= self.workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        pending.extend(future.result() for future in done)
+                    if len(pending) >= self.batch_size:
+                        self._flush(pending, base, out)
+                        pending = []
+                for future in in_flight:
+                    pending.append(future.result())
+                    if len(pending) >= self.batch_size:
+                        self._flush(pending, base, out)
+                        pending = []
+            self._flush(pending, base, out)
+
+    def _flush(self, results, base, out):
+        """翻译一批识别结果（批内相同的句子只翻译一次）并写出"""
+        if not results:
+            return
+        texts = [text for _, text, _, error in results if text.strip() and not error]
+        translations = {}
+        translation_error = None
+        if texts:
+            try:
+                translations = dict(zip(texts, self.segment_translator.translate_many(texts, self.src, self.dest)))
+            except TranslationError as e:
+                translation_error = f"translation failed: {e}"
+                logging.error(f"❌ {translation_error}")
+
+        for path, text, ocr_seconds, error in results:
+            if not error and text.strip() and translation_error:
+                error = translation_error
+            record = {
+                'path': os.path.relpath(path, base),
+                'text': text,
+                'translation': translations.get(text, '' if not text.strip() else None),
+                'ocr_seconds': round(ocr_seconds, 4),
+                'error': error,
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.written += 1
+            self.errors += bool(error)
+        out.flush()
+        logging.info(f"✅ {self.written} file(s) written, {self.errors} error(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='image file or directory (searched recursively)')
+    parser.add_argument('-o', '--output', default='results.jsonl')
+    parser.add_argument('--lang', default='eng', help='tesseract language, e.g. eng, jpn, chi_sim')
+    parser.add_argument('--src', default='en')
+    parser.add_argument('--dest', default='zh-cn')
+    parser.add_argument('--provider', choices=['google', 'youdao'], default=None, help='default: route by latency')
+    parser.add_argument('--workers', type=int, default=None, help='OCR processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=32, help='images per translation batch')
+    parser.add_argument('--restart', action='store_true', help='ignore existing results instead of resuming')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    batch = BatchTranslator(args.output, args.src, args.dest, args.lang, args.provider, args.workers, args.batch_size)
+    batch.run(args.input, resume=not args.restart)
+    stats = batch.segment_translator.stats()
+    logging.info(f"🏁 done: {batch.written} file(s), {batch.errors} error(s), "
+                 f"{stats['segments_translated']}/{stats['segments_total']} segment(s) sent to the translation service")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,12 @@ import os
 import sys
 import time
 import logging
+import multiprocessing
 from logging.handlers import RotatingFileHandler
 from PyQt5.QtWidgets import QApplication
 from MainWindow import MainWindow
 from Navigation import DraggableWindow
+from Metrics import start_exporter_from_env
 
 
 def setup_logging():
@@ -35,7 +37,11 @@ def setup_logging():
 
 
 if __name__ == "__main__":
+    # 打包后的程序启动 OCR 工作进程时需要
+    multiprocessing.freeze_support()
     setup_logging()
+    # METRICS_FILE / METRICS_PORT 设置时导出 Prometheus 指标
+    start_exporter_from_env()
     # app = QApplication(sys.argv)
     # window = MainWindow()
     # window.show()